@@ -0,0 +1,178 @@
+""" Benchmarks for the conversion core.
+
+Times geoid_height, sp_to_latlng, latlng_to_sp, ll_geoid_ht_calc and
+ne_geoid_ht_calc at 1, 1k, 100k and 1M points, with cold caches (tiles,
+splines and Transformers dropped before each run) and warm caches, plus
+the single-point flows the GUI runs on 'Ok'.
+
+By default the eight tiles are synthetic GEOID-format .asc files written to
+a temporary directory. Their surface is a known function, so results are
+checked against it at the lat1..lat8 sample points. With --real the
+g2018u*.asc files next to the program are used, and the sample points are
+checked against their expected offsets.
+
+    python benchmarks/bench_conversions.py [--quick] [--real] [--method M]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coord_converter import core  # noqa: E402
+
+SIZES = [1, 1000, 100000, 1000000]
+
+# (glamn, glomn) of the eight GEOID18 tiles, each 18 x 19 degrees
+TILE_ORIGINS = [(40, 230), (40, 247), (40, 264), (40, 281),
+                (24, 230), (24, 247), (24, 264), (24, 281)]
+
+ZONE = 'WA South'
+UNITS = 'us-ft'
+
+
+def synthetic_surface(lat, lng):
+    # smooth, geoid-like offsets in meters
+    return (-25 + 8 * np.sin(np.radians(lat) * 6)
+            * np.cos(np.radians(lng) * 4) + 0.05 * (lng + 100))
+
+
+def write_synthetic_tiles(directory, spacing):
+    paths = []
+    for i, (glamn, glomn) in enumerate(TILE_ORIGINS, 1):
+        nla = int(round(18 / spacing)) + 1
+        nlo = int(round(19 / spacing)) + 1
+        lats = glamn + spacing * np.arange(nla)
+        lngs = glomn - 360 + spacing * np.arange(nlo)
+        grid = synthetic_surface(lats[:, None], lngs[None, :])
+        path = os.path.join(directory, 'g2018u{0}.asc'.format(i))
+        with open(path, 'w') as f:
+            f.write(' {0:.6f} {1:.6f} {2:.9f} {2:.9f} {3} {4} 1\n'.format(
+                glamn, glomn, spacing, nla, nlo))
+            np.savetxt(f, grid, fmt='%.6f')
+        paths.append(path)
+    return paths
+
+
+def random_points(n, seed=0):
+    # points spread over the zone used for the XY benchmarks
+    rng = np.random.default_rng(seed)
+    return rng.uniform(45.6, 47.5, n), rng.uniform(-124.0, -117.0, n)
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(sizes, method, repeat):
+    code = core.epsg_code(ZONE, UNITS)
+    results = []
+
+    for n in sizes:
+        lat, lng = random_points(n)
+        if n == 1:
+            lat, lng = lat[0], lng[0]
+        ell = np.full(np.shape(lat), 100.0)
+        east, north = core.latlng_to_sp(lat, lng, code)
+
+        cases = [
+            ('geoid_height', lambda: core.geoid_height(lat, lng, method)),
+            ('latlng_to_sp', lambda: core.latlng_to_sp(lat, lng, code)),
+            ('sp_to_latlng', lambda: core.sp_to_latlng(east, north, code)),
+            ('ll_geoid_ht_calc', lambda: core.ll_geoid_ht_calc(
+                lat, lng, ell, 'm', method)),
+            ('ne_geoid_ht_calc', lambda: core.ne_geoid_ht_calc(
+                north, east, ell, code, UNITS, method)),
+        ]
+        for name, fn in cases:
+            core.clear_caches()
+            cold = timed(fn, 1)[0]
+            warm = timed(fn, repeat if n < 1000000 else 1)
+            results.append((name, n, cold, statistics.median(warm)))
+
+    # what the GUI does for one 'Ok' click
+    lat, lng = core.lat1, core.lng1
+    east, north = core.latlng_to_sp(lat, lng, code)
+
+    def gui_latlng():
+        core.latlng_to_sp(lat, lng, core.epsg_code(ZONE, UNITS))
+        core.ll_geoid_ht_calc(lat, lng, 100.0, 'ft', method)
+
+    def gui_ne():
+        lat_, lng_ = core.sp_to_latlng(east, north,
+                                       core.epsg_code(ZONE, UNITS))
+        core.ll_ellipsoid_ht_calc(lat_, lng_, 300.0, 'ft', method)
+
+    for name, fn in [('gui latlng flow', gui_latlng),
+                     ('gui ne flow', gui_ne)]:
+        core.clear_caches()
+        cold = timed(fn, 1)[0]
+        results.append((name, 1, cold, statistics.median(timed(fn, repeat))))
+    return results
+
+
+def check_samples(real, method):
+    lat = np.array([point[0] for point in core.sample_points])
+    lng = np.array([point[1] for point in core.sample_points])
+    got = core.geoid_height(lat, lng, method)
+    if real:
+        expected = np.array([np.nan if point[2] is None else point[2]
+                             for point in core.sample_points])
+        tolerance = 0.01
+    else:
+        expected = synthetic_surface(lat, lng)
+        tolerance = 0.01 if method == 'bilinear' else 0.001
+    known = ~np.isnan(expected)
+    error = np.abs(got[known] - expected[known])
+    assert np.all(error < tolerance), (
+        'sample points off by up to {0:.4f} m'.format(error.max()))
+    return error.max()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action='store_true',
+                        help='stop at 100k points')
+    parser.add_argument('--real', action='store_true',
+                        help='use the real g2018u*.asc tiles')
+    parser.add_argument('--method', choices=core.geoid_methods,
+                        default='spline')
+    parser.add_argument('--spacing', type=float, default=1 / 30,
+                        help='synthetic grid spacing in degrees '
+                             '(default: 2 minutes)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = None
+    if not args.real:
+        directory = tempfile.mkdtemp(prefix='coord_converter_bench_')
+        core.set_geoid_mosaic(core.GeoidMosaic(
+            write_synthetic_tiles(directory, args.spacing)))
+    try:
+        error = check_samples(args.real, args.method)
+        print('sample points ok, max error {0:.6f} m'.format(error))
+
+        sizes = SIZES[:-1] if args.quick else SIZES
+        print('{0:<18} {1:>8} {2:>12} {3:>12} {4:>14}'.format(
+            'benchmark', 'points', 'cold s', 'warm s', 'warm pts/s'))
+        for name, n, cold, warm in run(sizes, args.method, args.repeat):
+            print('{0:<18} {1:>8} {2:>12.6f} {3:>12.6f} {4:>14,.0f}'.format(
+                name, n, cold, warm, n / warm))
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
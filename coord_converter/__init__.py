@@ -0,0 +1,6 @@
+from coord_converter.core import (geoid_height, sp_to_latlng, latlng_to_sp,
+                                  ll_geoid_ht_calc, ll_ellipsoid_ht_calc,
+                                  ne_geoid_ht_calc, ne_ellipsoid_ht_calc,
+                                  epsg_code, epsg_codes_for)
+
+from coord_converter.pipeline import Pipeline, pipeline_for
@@ -0,0 +1,195 @@
+import argparse
+import os
+import sys
+
+from coord_converter import instrument
+from coord_converter.batch import default_columns, convert_points
+from coord_converter.columnar import (is_columnar, convert_columnar,
+                                      mixed_formats_error)
+from coord_converter.core import (geoid_methods, compare_methods,
+                                  enable_result_cache, grid_memory_bytes,
+                                  set_grid_memory_budget)
+from coord_converter.parallel import make_executor, convert_points_parallel
+
+
+def convert_file(input_path, output_path, chunksize=100000, sep=None,
+                 workers=None, **kwargs):
+    # stream the input in fixed-size chunks and append each converted chunk
+    # to the output, so memory use does not grow with the file size
+    if is_columnar(input_path) != is_columnar(output_path):
+        raise ValueError(mixed_formats_error)
+    executor = None
+    if workers is not None and workers > 1:
+        executor = make_executor(workers)
+        convert = lambda chunk: convert_points_parallel(chunk, executor,
+                                                        **kwargs)
+    else:
+        convert = lambda chunk: convert_points(chunk, **kwargs)
+
+    try:
+        if is_columnar(input_path):
+            return convert_columnar(input_path, output_path, convert,
+                                    chunksize)
+        return convert_csv(input_path, output_path, convert, chunksize, sep)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def convert_csv(input_path, output_path, convert, chunksize, sep=None):
+    import pandas as pd
+
+    if sep is None:
+        sep = '\t' if os.path.splitext(input_path)[1].lower() in (
+            '.tsv', '.tab') else ','
+    total = 0
+    with open(output_path, 'w', newline='') as out:
+        reader = pd.read_csv(input_path, sep=sep, chunksize=chunksize)
+        for i, chunk in enumerate(reader):
+            for name, values in convert(chunk).items():
+                chunk[name] = values
+            chunk.to_csv(out, sep=sep, header=(i == 0), index=False)
+            total += len(chunk)
+    return total
+
+
+def print_method_comparison():
+    # each method's offset and its difference from the spline, in meters
+    print('{0:>11} {1:>12} {2:>9}'.format('lat', 'lng', 'expected')
+          + ''.join(' {0:>11} {1:>9}'.format(method, 'diff')
+                    for method in geoid_methods))
+    for lat, lng, expected, offsets in compare_methods():
+        row = '{0:11.6f} {1:12.6f} {2:>9}'.format(
+            lat, lng, '' if expected is None else '{0:.3f}'.format(expected))
+        for method in geoid_methods:
+            row += ' {0:11.4f} {1:9.4f}'.format(
+                offsets[method], offsets[method] - offsets['spline'])
+        print(row)
+
+
+def add_result_cache_arguments(parser):
+    parser.add_argument('--result-cache', type=int, metavar='SIZE',
+                        help='memoize up to SIZE conversion results of '
+                             'repeated points')
+    parser.add_argument('--result-cache-db', metavar='PATH',
+                        help='SQLite file to keep memoized results in '
+                             'across runs (implies --result-cache)')
+
+
+def add_grid_memory_argument(parser):
+    parser.add_argument('--grid-memory', type=float, metavar='MB',
+                        help='memory budget for loaded geoid tiles and '
+                             'splines, the least recently used are dropped '
+                             'beyond it (default: 256)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='coord_converter')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser(
+        'convert', help='convert a CSV/TSV, Parquet or Arrow point file')
+    convert.add_argument('input')
+    convert.add_argument('output')
+    convert.add_argument('--input-type', choices=['latlng', 'ne'],
+                         default='latlng',
+                         help='input coordinates are lat/lng or '
+                              'northing/easting (default: latlng)')
+    convert.add_argument('--height', choices=['ellipsoid', 'geoid'],
+                         default='ellipsoid',
+                         help='the elevation column is an ellipsoid or '
+                              'geoid height (default: ellipsoid)')
+    convert.add_argument('--zone', help='StatePlane zone label for every '
+                         'row instead of the zone column, or "auto" to '
+                         'detect each lat/lng point\'s zone (points near zone '
+                         'lines are left unresolved)')
+    convert.add_argument('--units', choices=['m', 'ft', 'us-ft'],
+                         help='units for every row instead of the units '
+                              'column')
+    convert.add_argument('--interp', choices=geoid_methods,
+                         default='spline',
+                         help='geoid interpolation method (default: spline)')
+    convert.add_argument('--chunksize', type=int, default=100000)
+    convert.add_argument('--workers', type=int,
+                         help='convert in parallel across this many '
+                              'processes')
+    convert.add_argument('--profile', action='store_true',
+                         help='print per-stage timers, counters and cache '
+                              'stats (Prometheus text) to stderr; with '
+                              '--workers only the main process is counted')
+    add_result_cache_arguments(convert)
+    add_grid_memory_argument(convert)
+    convert.add_argument('--sep', help='field separator (default: tab for '
+                         '.tsv/.tab files, comma otherwise)')
+    for key, column in default_columns.items():
+        convert.add_argument('--{0}-col'.format(key), default=column,
+                             help='{0} column name (default: {1})'.format(
+                                 key, column))
+
+    commands.add_parser(
+        'compare-interp', help='compare the geoid interpolation methods at '
+                               'the sample points')
+
+    serve = commands.add_parser(
+        'serve', help='run the local HTTP conversion service')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8035)
+    serve.add_argument('--unix', help='listen on this Unix socket path '
+                       'instead of TCP')
+    serve.add_argument('--max-delay', type=float, default=2.0,
+                       help='milliseconds to gather requests into one '
+                            'batch (default: 2)')
+    add_result_cache_arguments(serve)
+    add_grid_memory_argument(serve)
+
+    args = parser.parse_args(argv)
+
+    if getattr(args, 'result_cache', None) or getattr(
+            args, 'result_cache_db', None):
+        enable_result_cache(args.result_cache or 100000,
+                            args.result_cache_db)
+
+    if getattr(args, 'grid_memory', None) is not None:
+        # the environment carries the budget to --workers processes
+        try:
+            nbytes = grid_memory_bytes(args.grid_memory)
+        except ValueError as e:
+            parser.error('--grid-memory: {0}'.format(e))
+        os.environ['COORD_CONVERTER_GRID_MB'] = str(args.grid_memory)
+        set_grid_memory_budget(nbytes)
+
+    try:
+        if args.command == 'convert':
+            if is_columnar(args.input) != is_columnar(args.output):
+                parser.error(mixed_formats_error)
+            if args.profile:
+                instrument.enable()
+            names = {key: getattr(args, key + '_col')
+                     for key in default_columns}
+            total = convert_file(args.input, args.output,
+                                 chunksize=args.chunksize, sep=args.sep,
+                                 workers=args.workers,
+                                 input_type=args.input_type,
+                                 height=args.height, zone=args.zone,
+                                 units=args.units, names=names,
+                                 method=args.interp)
+            print("converted {0} points".format(total), file=sys.stderr)
+            if args.profile:
+                sys.stderr.write(instrument.prometheus_text())
+        elif args.command == 'compare-interp':
+            print_method_comparison()
+        elif args.command == 'serve':
+            import asyncio
+            from coord_converter.server import serve as run_server
+            try:
+                asyncio.run(run_server(args.host, args.port, args.unix,
+                                       args.max_delay / 1000))
+            except KeyboardInterrupt:
+                pass
+    except (OSError, ValueError) as e:
+        # missing geoid tiles, unreadable input, bad values
+        parser.exit(1, '{0}: error: {1}\n'.format(parser.prog, e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import warnings
+
+import numpy as np
+
+from coord_converter.core import epsg_codes_for, metres_per_unit
+from coord_converter.pipeline import get_pipeline
+
+# default input column names, override with the matching CLI options
+default_columns = {
+    'lat': 'lat',
+    'lng': 'lng',
+    'north': 'northing',
+    'east': 'easting',
+    'elev': 'elev',
+    'zone': 'zone',
+    'units': 'units',
+}
+
+
+def convert_points(columns, input_type='latlng', height='ellipsoid',
+                   zone=None, units=None, names=default_columns,
+                   method='spline'):
+    """ Convert one chunk of points, returns a dict of new output columns.
+
+    columns is anything indexable by column name (a DataFrame chunk or a
+    dict of arrays). zone / units override the per-row zone and unit columns;
+    zone='auto' picks each lat/lng point's zone with coord_converter.zones,
+    and points without a single matching zone are left unresolved.
+    Rows whose zone has no EPSG code in their units get nan XY output, and
+    rows with unknown units get no output at all.
+    method is the geoid interpolation method, see core.geoid_methods.
+    """
+    if input_type == 'latlng':
+        a = np.asarray(columns[names['lat']], dtype=float)
+        b = np.asarray(columns[names['lng']], dtype=float)
+    else:
+        a = np.asarray(columns[names['north']], dtype=float)
+        b = np.asarray(columns[names['east']], dtype=float)
+    n = len(a)
+
+    if zone == 'auto':
+        if input_type != 'latlng':
+            raise ValueError("zone='auto' needs lat/lng input")
+        from coord_converter.zones import resolve_zones
+        zones = resolve_zones(a, b).astype(str)
+        unresolved = np.count_nonzero(zones == '')
+        if unresolved:
+            warnings.warn('{0} of {1} points have no unambiguous StatePlane '
+                          'zone and get no XY output; pass --zone or a zone '
+                          'column for them'.format(unresolved, n))
+    elif zone is not None:
+        zones = np.full(n, zone)
+    else:
+        zones = np.asarray(columns[names['zone']]).astype(str)
+    unit_values = (np.full(n, units) if units is not None
+                   else np.asarray(columns[names['units']]).astype(str))
+    codes = epsg_codes_for(zones, unit_values)
+    unit_names, unit_ids = np.unique(unit_values, return_inverse=True)
+    elev = None
+    if names['elev'] in columns:
+        elev = np.asarray(columns[names['elev']], dtype=float)
+
+    x = np.full(n, np.nan)
+    y = np.full(n, np.nan)
+    z = np.full(n, np.nan)
+    offset_m = np.full(n, np.nan)
+
+    # run each (EPSG code, units) group through one compiled pipeline;
+    # code 0 marks zones with no code in the requested units
+    groups, group = np.unique(np.stack([codes, unit_ids.ravel()]), axis=1,
+                              return_inverse=True)
+    group = group.ravel()
+    unknown = np.isin(unit_values, list(metres_per_unit), invert=True)
+    if unknown.any():
+        warnings.warn('{0} of {1} points have units other than {2} and get '
+                      'no output'.format(np.count_nonzero(unknown), n,
+                                         ', '.join(metres_per_unit)))
+    for i, (code, unit_id) in enumerate(groups.T):
+        group_units = str(unit_names[unit_id])
+        if input_type == 'ne' and not code:
+            continue
+        if group_units not in metres_per_unit:
+            # no code either, and no scale for the heights
+            continue
+        idx = np.flatnonzero(group == i)
+        pipeline = get_pipeline(int(code) or None, group_units, input_type,
+                                height, method)
+        gx, gy, gz, offset = pipeline.run(
+            a[idx], b[idx], None if elev is None else elev[idx], copy=False)
+        if gx is not None:
+            x[idx], y[idx] = gx, gy
+        if gz is not None:
+            z[idx], offset_m[idx] = gz, offset
+
+    if input_type == 'latlng':
+        out = {'easting': x, 'northing': y}
+    else:
+        out = {'lat': x, 'lng': y}
+    if zone == 'auto':
+        out['detected_zone'] = zones
+    if elev is not None:
+        out['geoid_offset_m'] = offset_m
+        out['geoid_offset_ft'] = offset_m / metres_per_unit['ft']
+        if height == 'ellipsoid':
+            out['geoid_height'] = z
+        else:
+            out['ellipsoid_height'] = z
+    return out
@@ -0,0 +1,129 @@
+import numpy as np
+
+# Parquet and Arrow IPC (.arrow/.feather) input and output for batch
+# conversions. pyarrow is optional and only imported here.
+#
+# The input is read one record batch at a time, and the converted columns
+# are appended to that batch before it is written, so the full table is
+# never in memory. Coordinate columns reach NumPy through to_numpy(), which
+# does not copy numeric columns without nulls. Only the columns the
+# conversion asks for are converted.
+
+parquet_extensions = ('.parquet', '.pq')
+arrow_extensions = ('.arrow', '.feather', '.ipc')
+# CSV <-> Parquet/Arrow conversions are not supported
+mixed_formats_error = ('input and output must both be CSV/TSV or both be '
+                       'Parquet/Arrow (.parquet, .pq, .arrow, .feather, '
+                       '.ipc)')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("pyarrow is required for Parquet/Arrow files: "
+                          "pip install pyarrow") from None
+    return pyarrow
+
+
+class BatchColumns:
+    """ Column access by name into a record batch, as NumPy arrays. """
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.names = batch.schema.names
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        if name not in self.names:
+            raise KeyError(name)
+        column = self.batch.column(self.names.index(name))
+        return column.to_numpy(zero_copy_only=False)
+
+
+def _with_columns(pa, batch, new_columns):
+    # the batch with converted columns appended, or replaced if the input
+    # already has a column of that name
+    names = list(batch.schema.names)
+    arrays = list(batch.columns)
+    for name, values in new_columns.items():
+        values = np.asarray(values)
+        array = pa.array(values if values.dtype != object
+                         else values.astype(str))
+        if name in names:
+            arrays[names.index(name)] = array
+        else:
+            names.append(name)
+            arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def _empty_batch(pa, schema):
+    return pa.RecordBatch.from_arrays(
+        [pa.array([], type=field.type) for field in schema], schema=schema)
+
+
+def _read_batches(pa, input_path, chunksize):
+    # an input without rows still yields one empty batch, so the output
+    # gets a valid file with the converted columns
+    if input_path.lower().endswith(parquet_extensions):
+        parquet = pa.parquet.ParquetFile(input_path)
+        empty = True
+        for batch in parquet.iter_batches(batch_size=chunksize):
+            empty = False
+            yield batch
+        if empty:
+            yield _empty_batch(pa, parquet.schema_arrow)
+    else:
+        with pa.memory_map(input_path) as source:
+            reader = pa.ipc.open_file(source)
+            empty = True
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for start in range(0, batch.num_rows, chunksize):
+                    empty = False
+                    yield batch.slice(start, chunksize)
+            if empty:
+                yield _empty_batch(pa, reader.schema)
+
+
+def convert_columnar(input_path, output_path, convert, chunksize=100000):
+    """ Stream input_path through convert(columns) -> {name: array} into
+    output_path. Each path may be Parquet or Arrow IPC, by its own
+    extension. """
+    if not (is_columnar(input_path) and is_columnar(output_path)):
+        raise ValueError(mixed_formats_error)
+    pa = _pyarrow()
+    to_parquet = output_path.lower().endswith(parquet_extensions)
+    writer = None
+    sink = None
+    total = 0
+    try:
+        for batch in _read_batches(pa, input_path, chunksize):
+            batch = _with_columns(pa, batch, convert(BatchColumns(batch)))
+            if writer is None:
+                if to_parquet:
+                    writer = pa.parquet.ParquetWriter(output_path,
+                                                      batch.schema)
+                else:
+                    sink = pa.OSFile(output_path, 'wb')
+                    writer = pa.ipc.new_file(sink, batch.schema)
+            if to_parquet:
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            total += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+        if sink is not None:
+            sink.close()
+    return total
+
+
+def is_columnar(path):
+    return path.lower().endswith(parquet_extensions + arrow_extensions)
@@ -0,0 +1,763 @@
+import hashlib
+import numpy as np
+import os, sys
+import tempfile
+import threading
+import warnings
+from collections import OrderedDict
+from functools import lru_cache
+
+from coord_converter.instrument import stage, count
+
+# scipy, pandas and pyproj are imported where they are first needed, so
+# importing this module stays cheap for services and the GUI start-up
+
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+        if not os.path.exists(os.path.join(base_path, relative_path)):
+            # run from elsewhere (library, CLI, server), use the files
+            # next to the package
+            base_path = os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__)))
+
+    return os.path.join(base_path, relative_path)
+
+# Test Variables for Geoid Offset
+# ---------------------------------------------------------
+
+# lat long in section 1, expected output: -21.320
+lat1 = 46.722092
+lng1 = -119.593764
+
+# lat long in section 2, expected output: -17.738
+lat2 = 47.774909
+lng2 = -103.038359
+
+# lat long in section 3, expected output: -34.258
+lat3 = 44.932176
+lng3 = -85.050656
+
+# lat long in section 4, expected output: -24.392
+lat4 = 46.586622
+lng4 = -68.946552
+
+# lat long in section 5, expected output:
+lat5 = 35.244635
+lng5 = -117.594686
+
+# lat long in section 6, expected output: -25.507
+lat6 = 30.582375
+lng6 = -97.876989
+
+# lat long in section 7, expected output:
+lat7 = 30.535319
+lng7 = -84.822393
+
+# lat long in section 8, expected output:
+lat8 = 35.766048
+lng8 = -75.888771
+
+# (lat, lng, expected geoid offset in meters or None)
+sample_points = [
+    (lat1, lng1, -21.320),
+    (lat2, lng2, -17.738),
+    (lat3, lng3, -34.258),
+    (lat4, lng4, -24.392),
+    (lat5, lng5, None),
+    (lat6, lng6, -25.507),
+    (lat7, lng7, None),
+    (lat8, lng8, None),
+]
+
+# ---------------------------------------------------------
+
+'''
+ASCII HEADERS
+
+glamn      Southermost Latitude  of grid (decimal degrees)
+glomn      Westernmost Longitude of grid (decimal degrees)
+dla        Latitude spacing  of grid     (decimal degrees)
+dlo        Longitude spacing of grid     (decimal degrees)
+nla        Number of rows    of grid
+nlo        Number of columns of grid
+ikind      Set to "1", meaning the gridded data is "real*4"
+'''
+
+
+# in-process caches of loaded tiles and splines:
+# {ascFile: (lats, longs, grid)} and {(ascFile, band): spline}
+_grid_cache = {}
+_spline_cache = {}
+# held while a tile or spline is built, so a background pre-warm and a
+# conversion never build the same one twice
+_tile_lock = threading.RLock()
+
+# Memory budget, in bytes, for the loaded tiles and splines. Once it is
+# exceeded the least recently used are dropped and rebuilt on their next
+# use. None means no limit. Memory-mapped grids count as 0 bytes, their
+# pages belong to the .npy file and the OS pages in only the rows that
+# are read. Set with set_grid_memory_budget() or COORD_CONVERTER_GRID_MB.
+def grid_memory_bytes(mb):
+    # a size in MB (number or string) -> bytes, ValueError unless it is a
+    # finite, non-negative number
+    try:
+        value = float(mb)
+    except (TypeError, ValueError):
+        value = None
+    if value is None or not 0 <= value < float('inf'):
+        raise ValueError('expected a size in MB, got {0!r}'.format(mb))
+    return int(value * 2 ** 20)
+
+
+def _budget_from_env(default_mb=256):
+    # a bad value falls back to the default instead of breaking the import
+    value = os.environ.get('COORD_CONVERTER_GRID_MB', '')
+    if not value:
+        return default_mb * 2 ** 20
+    try:
+        return grid_memory_bytes(value)
+    except ValueError:
+        warnings.warn('ignoring COORD_CONVERTER_GRID_MB={0!r}, expected a '
+                      'size in MB; using {1} MB'.format(value, default_mb))
+        return default_mb * 2 ** 20
+
+
+grid_memory_budget = _budget_from_env()
+# (cache name, key) -> bytes, least recently used first
+_resident = OrderedDict()
+_resident_bytes = 0
+_caches = {'tile': _grid_cache, 'spline': _spline_cache}
+
+
+def set_grid_memory_budget(nbytes):
+    global grid_memory_budget
+    with _tile_lock:
+        grid_memory_budget = nbytes
+        _evict()
+
+
+def grid_memory_used():
+    return _resident_bytes
+
+
+def _touch(kind, key):
+    # mark a cached tile or spline as recently used
+    try:
+        _resident.move_to_end((kind, key))
+    except KeyError:
+        # dropped by another thread meanwhile
+        pass
+
+
+def _remember(kind, key, value, nbytes):
+    # called with _tile_lock held
+    global _resident_bytes
+    _caches[kind][key] = value
+    _resident[kind, key] = nbytes
+    _resident_bytes += nbytes
+    _evict()
+
+
+def _evict():
+    # drop the least recently used entries until the budget is met, the
+    # newest entry always stays
+    global _resident_bytes
+    while (grid_memory_budget is not None
+           and _resident_bytes > grid_memory_budget and len(_resident) > 1):
+        (kind, key), nbytes = _resident.popitem(last=False)
+        _caches[kind].pop(key, None)
+        _resident_bytes -= nbytes
+        count('geoid.evictions')
+
+
+def read_asc_header(ascFile):
+    # only the first line of the .asc file is needed for the header
+    with open(ascFile) as f:
+        glamn, glomn, dla, dlo, nla, nlo, ikind = f.readline().split()[:7]
+    glomn = -360 + float(glomn)
+    return float(glamn), glomn, float(dla), float(dlo), int(nla), int(nlo)
+
+
+def parse_asc(ascFile):
+    # grid values are "real*4", so float32 holds them without loss
+    glamn, glomn, dla, dlo, nla, nlo = read_asc_header(ascFile)
+    with stage('geoid.parse'):
+        with open(ascFile) as f:
+            f.readline()
+            grid = np.array(f.read().split(), dtype=np.float32)
+    return grid.reshape(nla, nlo)
+
+
+def asc_to_npy(ascFile, npyFile=None):
+    # one-time conversion of an .asc tile into a float32 .npy grid; written
+    # to a temporary file and renamed into place, so other processes never
+    # see a half-written grid
+    if npyFile is None:
+        npyFile = os.path.splitext(ascFile)[0] + '.npy'
+    grid = parse_asc(ascFile)
+    fd, tmpFile = tempfile.mkstemp(suffix='.npy',
+                                   dir=os.path.dirname(npyFile) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, grid)
+        os.replace(tmpFile, npyFile)
+    except BaseException:
+        os.unlink(tmpFile)
+        raise
+    return grid
+
+
+def load_grid(ascFile):
+    # memory-map the binary grid, converting the .asc file on first use
+    npyFile = os.path.splitext(ascFile)[0] + '.npy'
+    if (not os.path.exists(npyFile)
+            or os.path.getmtime(npyFile) < os.path.getmtime(ascFile)):
+        try:
+            asc_to_npy(ascFile, npyFile)
+        except OSError:
+            # read-only location (e.g. PyInstaller bundle), parse in memory
+            return parse_asc(ascFile)
+    try:
+        return np.load(npyFile, mmap_mode='r')
+    except (OSError, ValueError):
+        # truncated or unreadable .npy file, fall back to the .asc file
+        return parse_asc(ascFile)
+
+
+def load_tile(ascFile):
+    # build the coordinate arrays and grid at most once per tile
+    tile = _grid_cache.get(ascFile)
+    if tile is not None:
+        _touch('tile', ascFile)
+        return tile
+
+    with _tile_lock:
+        tile = _grid_cache.get(ascFile)
+        if tile is not None:
+            return tile
+
+        glamn, glomn, dla, dlo, nla, nlo = read_asc_header(ascFile)
+
+        # calculate coordinate arrays
+        lats = glamn + dla * np.arange(nla)
+        longs = glomn + dlo * np.arange(nlo)
+
+        with stage('geoid.load'):
+            grid = load_grid(ascFile)
+        count('geoid.tiles_loaded')
+
+        tile = (lats, longs, grid)
+        nbytes = lats.nbytes + longs.nbytes
+        if not isinstance(grid, np.memmap):
+            nbytes += grid.nbytes
+        _remember('tile', ascFile, tile, nbytes)
+    return tile
+
+
+# The bicubic spline is fitted over bands of band_rows grid rows rather
+# than the whole tile, so a query only pulls in the rows around it. Each
+# band's fit reaches band_margin rows past the band on both sides, which
+# keeps it within micrometres of a whole-tile fit.
+band_rows = 60
+band_margin = 10
+
+
+def tile_bands(ascFile, lat):
+    # band of each latitude in the tile
+    lats = load_tile(ascFile)[0]
+    bands = ((np.asarray(lat) - lats[0])
+             // ((lats[1] - lats[0]) * band_rows)).astype(int)
+    return np.minimum(np.maximum(bands, 0), (len(lats) - 2) // band_rows)
+
+
+def band_spline(ascFile, band):
+    # fitted the first time a point falls in the band
+    key = (ascFile, band)
+    spline = _spline_cache.get(key)
+    if spline is not None:
+        _touch('spline', key)
+        return spline
+
+    with _tile_lock:
+        spline = _spline_cache.get(key)
+        if spline is not None:
+            return spline
+        from scipy.interpolate import RectBivariateSpline as Spline
+        lats, longs, grid = load_tile(ascFile)
+        lo = max(band * band_rows - band_margin, 0)
+        hi = min((band + 1) * band_rows + band_margin + 1, len(lats))
+        with stage('geoid.spline_build'):
+            spline = Spline(lats[lo:hi], longs, grid[lo:hi])
+        count('geoid.bands_built')
+        nbytes = (sum(knots.nbytes for knots in spline.get_knots())
+                  + spline.get_coeffs().nbytes)
+        _remember('spline', key, spline, nbytes)
+    return spline
+
+
+# Interpolation engines
+# ---------------------------------------------------------
+# 'spline'       bicubic RectBivariateSpline fitted over bands of rows
+# 'bilinear'     the 2x2 grid nodes around each point
+# 'biquadratic'  the 3x3 grid nodes centred on the nearest node, as in the
+#                NGS interpolation programs
+# bilinear and biquadratic only index into the grid, no fitting is done
+
+geoid_methods = ('spline', 'bilinear', 'biquadratic')
+
+
+def _grid_position(lats, longs, lat, lng):
+    # fractional row and column of each point in the grid
+    fi = (lat - lats[0]) / (lats[1] - lats[0])
+    fj = (lng - longs[0]) / (longs[1] - longs[0])
+    return fi, fj
+
+
+def bilinear(lats, longs, grid, lat, lng):
+    fi, fj = _grid_position(lats, longs, lat, lng)
+    i = np.clip(np.floor(fi).astype(int), 0, len(lats) - 2)
+    j = np.clip(np.floor(fj).astype(int), 0, len(longs) - 2)
+    t = fi - i
+    u = fj - j
+    return ((1 - t) * ((1 - u) * grid[i, j] + u * grid[i, j + 1])
+            + t * ((1 - u) * grid[i + 1, j] + u * grid[i + 1, j + 1]))
+
+
+def _quadratic_weights(t):
+    # Lagrange weights for nodes at -1, 0 and 1
+    return t * (t - 1) / 2, 1 - t * t, t * (t + 1) / 2
+
+
+def biquadratic(lats, longs, grid, lat, lng):
+    fi, fj = _grid_position(lats, longs, lat, lng)
+    i = np.clip(np.rint(fi).astype(int), 1, len(lats) - 2)
+    j = np.clip(np.rint(fj).astype(int), 1, len(longs) - 2)
+    wi = _quadratic_weights(fi - i)
+    wj = _quadratic_weights(fj - j)
+    ht = 0.0
+    for a in range(3):
+        row = (wj[0] * grid[i + a - 1, j - 1] + wj[1] * grid[i + a - 1, j]
+               + wj[2] * grid[i + a - 1, j + 1])
+        ht = ht + wi[a] * row
+    return ht
+
+
+def interpolate_tile(ascFile, lat, lng, method='spline'):
+    count('geoid.points', len(lat))
+    if method == 'spline':
+        bands = tile_bands(ascFile, lat)
+        if len(bands) == 1 or bands.min() == bands.max():
+            interp = band_spline(ascFile, int(bands[0]))
+            with stage('geoid.evaluate'):
+                return interp.ev(lat, lng)
+        ht = np.empty(len(lat))
+        for band in np.unique(bands):
+            mask = bands == band
+            interp = band_spline(ascFile, int(band))
+            with stage('geoid.evaluate'):
+                ht[mask] = interp.ev(lat[mask], lng[mask])
+        return ht
+    lats, longs, grid = load_tile(ascFile)
+    if method == 'bilinear':
+        with stage('geoid.evaluate'):
+            return bilinear(lats, longs, grid, lat, lng)
+    if method == 'biquadratic':
+        with stage('geoid.evaluate'):
+            return biquadratic(lats, longs, grid, lat, lng)
+    raise ValueError("unknown interpolation method {0!r}, expected one of "
+                     "{1}".format(method, ', '.join(geoid_methods)))
+
+# GEOID18 tiles, in the order that decides which tile owns an overlap
+geoid_tiles = ['g2018u{0}.asc'.format(i) for i in range(1, 9)]
+
+
+class GeoidMosaic:
+    """ The GEOID18 tiles as one virtual grid.
+
+    Only the .asc headers are read up front. A tile's grid is loaded the
+    first time a query falls inside it. Where tiles overlap, the tile
+    earliest in ascFiles owns the overlap, and tile edges are inclusive.
+    Missing tiles are skipped with a warning, and FileNotFoundError is
+    raised when none of them exist.
+    """
+
+    def __init__(self, ascFiles):
+        ascFiles = list(ascFiles)
+        self.ascFiles = [ascFile for ascFile in ascFiles
+                         if os.path.exists(ascFile)]
+        missing = [ascFile for ascFile in ascFiles
+                   if ascFile not in self.ascFiles]
+        if not self.ascFiles:
+            raise FileNotFoundError('no geoid tiles found: {0}'.format(
+                ', '.join(ascFiles)))
+        if missing:
+            # points in the missing tiles' areas come back as nan
+            warnings.warn('geoid tiles not found: {0}'.format(
+                ', '.join(missing)))
+        # names the tiles and their versions, part of the result cache key
+        # so cached geoid heights are not reused for other or updated tiles
+        self.identity = hashlib.sha1(repr([
+            (os.path.abspath(ascFile), os.path.getmtime(ascFile))
+            for ascFile in self.ascFiles]).encode()).hexdigest()[:16]
+        bounds = []
+        for ascFile in self.ascFiles:
+            glamn, glomn, dla, dlo, nla, nlo = read_asc_header(ascFile)
+            bounds.append((glamn, glamn + dla * (nla - 1),
+                           glomn, glomn + dlo * (nlo - 1)))
+        # headers carry 6 decimals, rounding merges shared tile edges
+        bounds = np.round(np.array(bounds, dtype=float).reshape(-1, 4), 6)
+        south, north, west, east = bounds.T
+
+        # split the covered area into cells at every tile edge, each cell
+        # belongs to the first tile that contains it
+        self.lat_edges = np.unique(np.concatenate([south, north]))
+        self.lng_edges = np.unique(np.concatenate([west, east]))
+        lat_mid = (self.lat_edges[:-1] + self.lat_edges[1:]) / 2
+        lng_mid = (self.lng_edges[:-1] + self.lng_edges[1:]) / 2
+        self.cell_tile = np.full((len(lat_mid), len(lng_mid)), -1)
+        for i in reversed(range(len(self.ascFiles))):
+            inside = ((south[i] < lat_mid[:, None])
+                      & (lat_mid[:, None] < north[i])
+                      & (west[i] < lng_mid[None, :])
+                      & (lng_mid[None, :] < east[i]))
+            self.cell_tile[inside] = i
+
+    def _cells(self, edges, values):
+        # cell of each value, the last edge belongs to the last cell
+        cells = np.searchsorted(edges, values, side='right') - 1
+        return np.where(values == edges[-1], len(edges) - 2, cells)
+
+    def tile_index(self, lat, lng):
+        # position in ascFiles of the tile each point falls in, -1 for none
+        lat, lng = np.broadcast_arrays(np.asarray(lat, dtype=float),
+                                       np.asarray(lng, dtype=float))
+        rows = self._cells(self.lat_edges, lat)
+        cols = self._cells(self.lng_edges, lng)
+        index = self._owner(rows, cols)
+
+        # a point on an inner cell edge also touches the cells south and
+        # west of it, which may belong to an earlier tile
+        on_row_edge = (rows > 0) & (rows < len(self.lat_edges) - 1)
+        on_row_edge &= lat == self.lat_edges[np.where(on_row_edge, rows, 0)]
+        on_col_edge = (cols > 0) & (cols < len(self.lng_edges) - 1)
+        on_col_edge &= lng == self.lng_edges[np.where(on_col_edge, cols, 0)]
+        edge = np.flatnonzero(on_row_edge | on_col_edge)
+        if edge.size:
+            rows, cols = rows.ravel()[edge], cols.ravel()[edge]
+            south = rows - on_row_edge.ravel()[edge]
+            west = cols - on_col_edge.ravel()[edge]
+            first = index.ravel()[edge]
+            for r, c in ((south, cols), (rows, west), (south, west)):
+                other = self._owner(r, c)
+                earlier = (other >= 0) & ((first < 0) | (other < first))
+                first = np.where(earlier, other, first)
+            index = index.copy()
+            index.ravel()[edge] = first
+        return index
+
+    def _owner(self, rows, cols):
+        # tile owning each cell, -1 outside the covered area
+        index = np.full(np.shape(rows), -1)
+        valid = ((rows >= 0) & (rows < self.cell_tile.shape[0])
+                 & (cols >= 0) & (cols < self.cell_tile.shape[1]))
+        index[valid] = self.cell_tile[rows[valid], cols[valid]]
+        return index
+
+    def geoid_height(self, lat, lng, method='spline'):
+        # lat and lng are 1-d arrays, nan outside every tile
+        ht = np.full(lat.shape, np.nan)
+        index = self.tile_index(lat, lng)
+
+        # bucket points by tile, then evaluate each tile once
+        for i in np.unique(index[index >= 0]):
+            mask = index == i
+            ht[mask] = interpolate_tile(self.ascFiles[i], lat[mask],
+                                        lng[mask], method)
+        return ht
+
+
+_mosaic = None
+
+
+def geoid_mosaic():
+    # mosaic of the bundled tiles, built on first use
+    global _mosaic
+    if _mosaic is None:
+        _mosaic = GeoidMosaic([resource_path(name) for name in geoid_tiles])
+    return _mosaic
+
+
+def set_geoid_mosaic(mosaic):
+    # use another set of tiles, e.g. GeoidMosaic over a different directory
+    global _mosaic
+    _mosaic = mosaic
+
+
+def clear_caches():
+    # drop every loaded tile, spline, Transformer and Pipeline
+    global _resident_bytes
+    with _tile_lock:
+        _grid_cache.clear()
+        _spline_cache.clear()
+        _resident.clear()
+        _resident_bytes = 0
+    get_transformer.cache_clear()
+    # pipelines hold on to their Transformer
+    from coord_converter.pipeline import get_pipeline
+    get_pipeline.cache_clear()
+
+
+def tile_index(lat, lng):
+    return geoid_mosaic().tile_index(lat, lng)
+
+
+def prewarm(lat, lng, method='spline'):
+    # load the tile (and band spline) a point falls in ahead of a conversion,
+    # returns the tile's position in the mosaic or -1
+    mosaic = geoid_mosaic()
+    i = int(mosaic.tile_index(lat, lng))
+    if i >= 0:
+        ascFile = mosaic.ascFiles[i]
+        if method == 'spline':
+            band_spline(ascFile, int(tile_bands(ascFile, lat)))
+        else:
+            load_tile(ascFile)
+    return i
+
+
+def geoid_height(latitude, longitude, method='spline'):
+    # accepts scalars or arrays; points outside every tile come back as nan
+    # method is one of geoid_methods
+    lat, lng = np.broadcast_arrays(np.asarray(latitude, dtype=float),
+                                   np.asarray(longitude, dtype=float))
+    shape = lat.shape
+
+    mosaic = geoid_mosaic()
+
+    def compute(a, b):
+        return (mosaic.geoid_height(np.atleast_1d(a), np.atleast_1d(b),
+                                    method),)
+
+    # calculate the geoid offset height in meters
+    param = (method, mosaic.identity)
+    if shape == ():
+        (ht,) = memoized('geoid', param, float(lat), float(lng), compute)
+        ht = np.ravel(ht)[0]
+        if np.isnan(ht):
+            print("invalid Lat, Lng")
+            return
+        return ht
+
+    (ht,) = memoized('geoid', param, lat.ravel(), lng.ravel(), compute)
+    return ht.reshape(shape)
+
+
+def compare_methods(points=sample_points):
+    """ Evaluate every interpolation method at points (the sample points by
+    default), returns a list of (lat, lng, expected, {method: offset}). """
+    lat = np.array([point[0] for point in points])
+    lng = np.array([point[1] for point in points])
+    results = {method: geoid_height(lat, lng, method)
+               for method in geoid_methods}
+    return [(point[0], point[1], point[2],
+             {method: results[method][k] for method in geoid_methods})
+            for k, point in enumerate(points)]
+
+
+# Optional memoized results, see coord_converter.result_cache
+# ---------------------------------------------------------
+
+_result_cache = None
+
+# decimals kept when quantizing the inputs of each conversion. A hit may
+# return the result stored for another point in the same quantum, so a
+# quantum must be far below the precision anything is reported at: 1e-9
+# degrees is about 0.1 mm, so results are off by at most ~0.06 mm, and
+# 1e-6 of a projected unit is a micrometre or less
+result_cache_decimals = {'geoid': 9, 'latlng_to_sp': 9, 'sp_to_latlng': 6}
+
+
+def enable_result_cache(maxsize=100000, path=None):
+    # path, when given, is a SQLite file the results persist in
+    global _result_cache
+    from coord_converter.result_cache import ResultCache
+    disable_result_cache()
+    _result_cache = ResultCache(maxsize, path)
+    return _result_cache
+
+
+def disable_result_cache():
+    global _result_cache
+    if _result_cache is not None:
+        _result_cache.close()
+    _result_cache = None
+
+
+def result_cache_stats():
+    return None if _result_cache is None else _result_cache.stats()
+
+
+def memoized(kind, param, a, b, compute):
+    # compute(a, b) -> tuple of arrays, answered from the result cache
+    # where possible; a plain call when the cache is off
+    if _result_cache is None:
+        return compute(a, b)
+    if isinstance(a, float) and isinstance(b, float):
+        return _result_cache.lookup_one(kind, param, a, b, compute,
+                                        result_cache_decimals[kind])
+    a_in, b_in = np.broadcast_arrays(np.asarray(a, dtype=float),
+                                     np.asarray(b, dtype=float))
+    if a_in.size == 0:
+        return compute(a, b)
+    results = _result_cache.lookup(kind, param, a_in.ravel(), b_in.ravel(),
+                                   compute, result_cache_decimals[kind])
+    if a_in.shape == ():
+        return tuple(float(r[0]) for r in results)
+    return tuple(r.reshape(a_in.shape) for r in results)
+
+
+# Transformers are expensive to build (PROJ database lookups), so they are
+# kept in a bounded LRU cache shared by every conversion
+
+
+@lru_cache(maxsize=32)
+def get_transformer(src_crs, dst_crs, always_xy=False):
+    # only runs on a cache miss
+    from pyproj import Transformer
+    with stage('transformer.create'):
+        return Transformer.from_crs(src_crs, dst_crs, always_xy=always_xy)
+
+
+def transformer_cache_info():
+    # hits, misses, maxsize, currsize of the Transformer cache
+    return get_transformer.cache_info()
+
+# convert from a stateplane zone to lat long(WGS84, EPSG: 4326)
+
+
+def sp_to_latlng(x, y, in_crs):
+    def transform(x, y):
+        transformer = get_transformer(in_crs, 4326)
+        with stage('transformer.transform'):
+            return transformer.transform(x, y)
+    lat, lng = memoized('sp_to_latlng', in_crs, x, y, transform)
+    return lat, lng
+
+# convert from lat long(WGS84, EPSG: 4326) to a stateplane zone
+
+
+def latlng_to_sp(lat, lng, out_crs):
+    def transform(lat, lng):
+        transformer = get_transformer(4326, out_crs)
+        with stage('transformer.transform'):
+            return transformer.transform(lat, lng)
+    lat_out, lng_out = memoized('latlng_to_sp', out_crs, lat, lng, transform)
+    return lat_out, lng_out
+
+# convert ellipsoid elevation to geoid and lat lng to stateplane
+
+# metres per unit of each supported linear unit; the US survey foot is
+# 1200/3937 m, the international foot exactly 0.3048 m
+metres_per_unit = {'m': 1.0, 'ft': 0.3048, 'us-ft': 1200 / 3937}
+
+# 46.722092
+# -119.593764
+
+# lat, lng and heights may be scalars or arrays of matching shape
+# ellipsoid heights are in meters, geoid heights in units
+
+def ll_geoid_ht_calc(lat, lng, ell_ht, units, method='spline'):
+    ell_ht = np.asarray(ell_ht, dtype=float)
+    geoid_offset_m = geoid_height(lat, lng, method)
+    geoid_offset_ft = geoid_offset_m / metres_per_unit['ft']
+    geoid_ht = (ell_ht - geoid_offset_m) / metres_per_unit[units]
+    return geoid_ht, geoid_offset_m, geoid_offset_ft
+
+def ll_ellipsoid_ht_calc(lat, lng, geoid_ht, units, method='spline'):
+    geoid_ht = np.asarray(geoid_ht, dtype=float)
+    geoid_offset_m = geoid_height(lat, lng, method)
+    geoid_offset_ft = geoid_offset_m / metres_per_unit['ft']
+    ell_ht = geoid_ht * metres_per_unit[units] + geoid_offset_m
+    return ell_ht, geoid_offset_m, geoid_offset_ft
+
+def ne_geoid_ht_calc(north, east, ell_ht, in_crs, units='m',
+                     method='spline'):
+    # ellipsoid height in meters -> geoid height in units, through the
+    # same Pipeline the batch converter uses
+    return _ne_height(north, east, ell_ht, in_crs, units, 'ellipsoid', method)
+
+def ne_ellipsoid_ht_calc(north, east, geoid_ht, in_crs, units='m',
+                         method='spline'):
+    # geoid height in units -> ellipsoid height in meters
+    return _ne_height(north, east, geoid_ht, in_crs, units, 'geoid', method)
+
+def _ne_height(north, east, h, in_crs, units, height, method):
+    from coord_converter.pipeline import get_pipeline
+    shape = np.broadcast(north, east, h).shape
+    _, _, z, _ = get_pipeline(in_crs, units, 'ne', height, method).run(
+        north, east, h)
+    return z[0] if shape == () else z.reshape(shape)
+
+
+# EPSG code lookup by StatePlane zone label and units
+# ---------------------------------------------------------
+
+epsg_columns = {'m': 'EPSG_m', 'ft': 'EPSG_ft', 'us-ft': 'EPSG_usft'}
+
+# {(zone label, units): EPSG code}, with None for units the zone has no
+# code in, and the zone labels in file order
+_epsg_table = None
+_epsg_labels = None
+
+
+def load_epsg_table():
+    global _epsg_table, _epsg_labels
+    if _epsg_table is None:
+        import csv
+        table = {}
+        labels = []
+        with open(resource_path('epsg-sp-nad83.csv'), newline='') as f:
+            for row in csv.DictReader(f):
+                labels.append(row['Label'])
+                for units, column in epsg_columns.items():
+                    code = row[column].strip()
+                    table[(row['Label'], units)] = int(code) if code else None
+        _epsg_table = table
+        _epsg_labels = labels
+    return _epsg_table
+
+
+def epsg_labels():
+    load_epsg_table()
+    return list(_epsg_labels)
+
+
+def epsg_code(label, units):
+    # raises ValueError when the zone has no code in the requested units
+    with stage('epsg.lookup'):
+        code = load_epsg_table().get((label, units))
+    if code is None:
+        raise ValueError("No EPSG code for {0} in {1}".format(label, units))
+    return code
+
+
+def epsg_codes_for(labels, units):
+    """ Map arrays of zone labels and units to EPSG codes, 0 where the zone
+    has no code in those units. Either argument may be a single value. """
+    table = load_epsg_table()
+    with stage('epsg.lookup'):
+        labels, units = np.broadcast_arrays(np.asarray(labels).astype(str),
+                                            np.asarray(units).astype(str))
+        # look codes up once per unique label and unit, then index
+        unique_labels, label_index = np.unique(labels, return_inverse=True)
+        unique_units, unit_index = np.unique(units, return_inverse=True)
+        codes = np.array([[table.get((label, u)) or 0 for u in unique_units]
+                          for label in unique_labels], dtype=np.int64)
+        # keeps the 2-D shape when there are no labels at all
+        codes = codes.reshape(len(unique_labels), len(unique_units))
+    return codes[label_index, unit_index].reshape(labels.shape)
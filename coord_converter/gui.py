@@ -0,0 +1,414 @@
+import functools
+import threading
+
+import PySimpleGUI as sg
+
+from coord_converter.core import (epsg_code, epsg_labels, sp_to_latlng,
+                                  latlng_to_sp, ll_geoid_ht_calc,
+                                  ll_ellipsoid_ht_calc, tile_index, prewarm)
+
+status = [(''), ('Please fill out all fields before converting.'), ('Please select StatePlane Zone and Units.')]
+crs_sub = [('This is the output coordinate system for conversion to Easting Northing'), ('This is the input coordinate system for conversion from Easting Northing')]
+
+
+def make_window():
+    sg.theme('DarkAmber')
+
+    epsg = [[sg.Listbox(epsg_labels(), size=(
+        20, 4), enable_events=False, key='_EPSG_')]]
+    radio_btns = [[sg.Radio('meters', 'RADIO1', key="METERS_RADIO", default=True)], [sg.Radio(
+        'int feet', 'RADIO1', key="INT_FT_RADIO", default=False)], [sg.Radio('survey feet', 'RADIO1', key="US_FT_RADIO", default=False)]]
+    latlong = [
+        [sg.Push(), sg.T('Latitude'), sg.Input(
+            key='LAT', enable_events=True, disabled_readonly_background_color='black')],
+        [sg.Push(), sg.T(
+            'Longitude'), sg.Input(key='LNG', enable_events=True, disabled_readonly_background_color='black')]
+    ]
+    nez = [
+        [sg.Push(), sg.T('Easting'), sg.Input(key='EAST', disabled=True,
+                                              disabled_readonly_background_color='black')],
+        [sg.Push(), sg.T('Northing'), sg.Input(key='NORTH', disabled=True,
+                                               disabled_readonly_background_color='black')]
+    ]
+    elev = [
+        [sg.Push(), sg.T('Elevation'), sg.Input(key='ELEV', disabled=False,
+                                                disabled_readonly_background_color='black')]
+    ]
+
+    layout = [
+        [sg.Text('Input Coordinates', size=(30, 1),
+                 font='Lucida', justification='left')],
+        [sg.Radio('Use Latitude and Longitude', 'RADIO2',
+                  key='LATLONG_RADIO', enable_events=True, default=True)],
+        [sg.Column(latlong, element_justification='l')],
+        [sg.Radio('Use Easting and Northing', 'RADIO2',
+                  key='NEZ_RADIO', enable_events=True, default=False)],
+        [sg.Column(nez, element_justification='l')],
+        [sg.Text('Input Elevation', size=(30, 1),
+                 font='Lucida', justification='left')],
+        [sg.Text(text='Leave blank if only doing XY conversions.', size=(60, 1), text_color='white',
+                 key='ELEV_SUB', justification='l')],
+        [sg.Radio('Ellipsoid', 'RADIO3',
+                  key='ELL_RADIO', enable_events=True, default=True),
+         sg.Radio('Geoid', 'RADIO3',
+                  key='GEO_RADIO', enable_events=True, default=False)],
+        [sg.Column(elev, element_justification='l')],
+        [sg.Text('Select Stateplane Zone and Units', size=(
+            30, 1), font='Lucida', justification='left')],
+        [sg.Text(text=crs_sub[0], size=(60, 1), text_color='white',
+                 key='CRS_SUB', justification='l')],
+        [sg.Column(epsg, element_justification='c'), sg.Column(
+            radio_btns, element_justification='l')],
+        [sg.Text(text=status[0], size=(50, 1), text_color='white',
+                 key='INDICATOR', justification='c')],
+        [sg.ProgressBar(100, orientation='h', size=(30, 10), key='PROGRESS',
+                        visible=False)],
+        [sg.Text('Output Values', size=(
+            30, 1), font='Lucida', justification='left')],
+        [sg.Push(), sg.T('Geoid Offset Meters', key='OFFSET_M_LABEL'), sg.Input(status[0], size=(50, 1), disabled=True, text_color=sg.theme_text_color(), disabled_readonly_background_color=sg.theme_text_element_background_color(),
+                                                       key='OFFSET_M', justification='l')],
+        [sg.Push(), sg.T('Geoid Offset Feet', key='OFFSET_FT_LABEL'), sg.Input(status[0], size=(50, 1), disabled=True, text_color=sg.theme_text_color(), disabled_readonly_background_color=sg.theme_text_element_background_color(),
+                                                       key='OFFSET_FT', justification='l')],
+        [sg.Push(), sg.T('X', key='X_LABEL'), sg.Input(status[0], size=(50, 1), disabled=True, text_color=sg.theme_text_color(), disabled_readonly_background_color=sg.theme_text_element_background_color(),
+                                                       key='X', justification='l')],
+        [sg.Push(), sg.T('Y', key='Y_LABEL'), sg.Input(status[0], size=(50, 1), disabled=True, text_color=sg.theme_text_color(), disabled_readonly_background_color=sg.theme_text_element_background_color(),
+                                                       key='Y', justification='l')],
+        [sg.Push(), sg.T('Z', key='Z_LABEL'), sg.Input(status[0], size=(50, 1), disabled=True, text_color=sg.theme_text_color(), disabled_readonly_background_color=sg.theme_text_element_background_color(),
+                                                       key='Z', justification='l')],
+        [sg.Text(text=status[0], size=(50, 1), text_color='white',
+                 key='WHITESPACE', justification='c')],
+        [sg.Button('Ok'), sg.Button('Stop', disabled=True), sg.Button('Cancel'), sg.Button('Reset')]]
+    return sg.Window('Coordinate Converter', layout, resizable=True)
+
+
+class _InvalidPoint(Exception):
+    pass
+
+
+def _heights(calc, lat, lng, elev, units):
+    # points outside every geoid tile have no offset
+    if tile_index(lat, lng) < 0:
+        raise _InvalidPoint()
+    return calc(lat, lng, elev, units)
+
+
+def convert(values, window, cancelled=lambda: False, progress=lambda pct: None):
+    """ Run the conversion for one 'Ok' click.
+
+    window only needs window[key].update(...), so this runs against an
+    _Updates collector on a worker thread and the GUI thread applies the
+    result. cancelled() is checked between the XY and elevation steps.
+    """
+    if values['_EPSG_'] and values['METERS_RADIO'] == True and values['LAT'] and values['LNG'] and values['LATLONG_RADIO'] == True:
+        try:
+            code = epsg_code(values['_EPSG_'][0], 'm')
+            print("code: ", code)
+            east, north = latlng_to_sp(
+                float(values['LAT']), float(values['LNG']), code)
+            window['X'].update(value=round(east, 3))
+            window['Y'].update(value=round(north, 3))
+            window['X_LABEL'].update(value='Easting m')
+            window['Y_LABEL'].update(value='Northing m')
+            window['INDICATOR'].update(value=status[0])
+        except ValueError:
+            error = "No ESPG Code for {0} in meters.".format(
+                values['_EPSG_'][0])
+            window['INDICATOR'].update(value=error)
+            window['X'].update(value='')
+            window['Y'].update(value='')
+    elif values['_EPSG_'] and values['INT_FT_RADIO'] == True and values['LAT'] and values['LNG'] and values['LATLONG_RADIO'] == True:
+        try:
+            code = epsg_code(values['_EPSG_'][0], 'ft')
+            print("code: ", code)
+            east, north = latlng_to_sp(
+                float(values['LAT']), float(values['LNG']), code)
+            window['X'].update(value=round(east, 3))
+            window['Y'].update(value=round(north, 3))
+            window['X_LABEL'].update(value='Easting int ft')
+            window['Y_LABEL'].update(value='Northing int ft')
+            window['INDICATOR'].update(value=status[0])
+        except ValueError:
+            error = "No ESPG Code for {0} in int feet.".format(
+                values['_EPSG_'][0])
+            window['INDICATOR'].update(value=error)
+            window['X'].update(value='')
+            window['Y'].update(value='')
+    elif values['_EPSG_'] and values['US_FT_RADIO'] == True and values['LAT'] and values['LNG'] and values['LATLONG_RADIO'] == True:
+        try:
+            code = epsg_code(values['_EPSG_'][0], 'us-ft')
+            print("code: ", code)
+            east, north = latlng_to_sp(
+                float(values['LAT']), float(values['LNG']), code)
+            window['X'].update(value=round(east, 3))
+            window['Y'].update(value=round(north, 3))
+            window['X_LABEL'].update(value='Easting usft')
+            window['Y_LABEL'].update(value='Northing usft')
+            window['INDICATOR'].update(value=status[0])
+        except ValueError:
+            error = "No ESPG Code for {0} in survey feet.".format(
+                values['_EPSG_'][0])
+            window['INDICATOR'].update(value=error)
+            window['X'].update(value='')
+            window['Y'].update(value='')
+    elif values['_EPSG_'] and values['METERS_RADIO'] == True and values['EAST'] and values['NORTH'] and values['NEZ_RADIO'] == True:
+        try:
+            code = epsg_code(values['_EPSG_'][0], 'm')
+            print("code: ", code)
+            lat, lng = sp_to_latlng(
+                float(values['EAST']), float(values['NORTH']), code)
+            window['X'].update(value=round(lat, 7))
+            window['Y'].update(value=round(lng, 7))
+            window['X_LABEL'].update(value='Latitude')
+            window['Y_LABEL'].update(value='Longitude')
+            window['INDICATOR'].update(value=status[0])
+        except ValueError:
+            error = "No ESPG Code for {0} in meters.".format(
+                values['_EPSG_'][0])
+            window['INDICATOR'].update(value=error)
+            window['X'].update(value='')
+            window['Y'].update(value='')
+    elif values['_EPSG_'] and values['INT_FT_RADIO'] == True and values['EAST'] and values['NORTH'] and values['NEZ_RADIO'] == True:
+        try:
+            code = epsg_code(values['_EPSG_'][0], 'ft')
+            print("code: ", code)
+            lat, lng = sp_to_latlng(
+                float(values['EAST']), float(values['NORTH']), code)
+            window['X'].update(value=round(lat, 7))
+            window['Y'].update(value=round(lng, 7))
+            window['X_LABEL'].update(value='Latitude')
+            window['Y_LABEL'].update(value='Longitude')
+            window['INDICATOR'].update(value=status[0])
+        except ValueError:
+            error = "No ESPG Code for {0} in int feet.".format(
+                values['_EPSG_'][0])
+            window['INDICATOR'].update(value=error)
+            window['X'].update(value='')
+            window['Y'].update(value='')
+    elif values['_EPSG_'] and values['US_FT_RADIO'] == True and values['EAST'] and values['NORTH'] and values['NEZ_RADIO'] == True:
+        try:
+            code = epsg_code(values['_EPSG_'][0], 'us-ft')
+            print("code: ", code)
+            lat, lng = sp_to_latlng(
+                float(values['EAST']), float(values['NORTH']), code)
+            window['X'].update(value=round(lat, 7))
+            window['Y'].update(value=round(lng, 7))
+            window['X_LABEL'].update(value='Latitude')
+            window['Y_LABEL'].update(value='Longitude')
+            window['INDICATOR'].update(value=status[0])
+        except ValueError:
+            error = "No ESPG Code for {0} in survey feet.".format(
+                values['_EPSG_'][0])
+            window['INDICATOR'].update(value=error)
+            window['X'].update(value='')
+            window['Y'].update(value='')
+
+    elif values['_EPSG_'] == []:
+        window['INDICATOR'].update(value=status[2])
+
+    elif ((values['EAST'] == '' and values['NORTH'] == '' and values['NEZ_RADIO'] == True) or (values['LAT'] == '' and values['LNG'] == '' and values['LATLONG_RADIO'] == True) or (values['ELEV'] == '' and values['ELL_RADIO'] == True) or (values['ELEV'] == '' and values['GEO_RADIO'] == True)):
+
+        window['INDICATOR'].update(status[1])
+
+    progress(50)
+    if cancelled():
+        return
+
+    if values['_EPSG_'] and values['LAT'] and values['LNG'] and values['LATLONG_RADIO'] == True and values['ELL_RADIO'] ==True and values['ELEV']:
+        if values['METERS_RADIO'] == True:
+            units = 'm'
+        elif values['INT_FT_RADIO'] == True:
+            units = 'ft'
+        elif values['US_FT_RADIO'] == True:
+            units = 'us-ft'
+        geoid_ht, geoid_offset_m, geoid_offset_ft = _heights(ll_geoid_ht_calc, float(values['LAT']), float(values['LNG']), float(values['ELEV']), units)
+        window['OFFSET_M'].update(value=round(float(geoid_offset_m), 3))
+        window['OFFSET_FT'].update(value=round(float(geoid_offset_ft), 3))
+        window['Z'].update(value=round(float(geoid_ht),2))
+        window['Z_LABEL'].update(value='Geoid Elevation ' + units)
+
+    elif values['_EPSG_'] and values['LAT'] and values['LNG'] and values['LATLONG_RADIO'] == True and values['GEO_RADIO'] ==True and values['ELEV']:
+        if values['METERS_RADIO'] == True:
+            units = 'm'
+        elif values['INT_FT_RADIO'] == True:
+            units = 'ft'
+        elif values['US_FT_RADIO'] == True:
+            units = 'us-ft'
+        ell_ht, geoid_offset_m, geoid_offset_ft = _heights(ll_ellipsoid_ht_calc, float(values['LAT']), float(values['LNG']), float(values['ELEV']), units)
+        window['OFFSET_M'].update(value=round(float(geoid_offset_m), 3))
+        window['OFFSET_FT'].update(value=round(float(geoid_offset_ft), 3))
+        window['Z'].update(value=round(float(ell_ht), 3))
+        window['Z_LABEL'].update(value='Ellipsoid Elevation m')
+
+    elif values['_EPSG_'] and values['NORTH'] and values['EAST'] and values['NEZ_RADIO'] == True and values['GEO_RADIO'] ==True and values['ELEV']:
+        try:
+            if values['METERS_RADIO'] == True:
+                units = 'm'
+                epsg_units = 'm'
+            elif values['INT_FT_RADIO'] == True:
+                units = 'ft'
+                epsg_units = 'ft'
+            elif values['US_FT_RADIO'] == True:
+                units = 'us-ft'
+                epsg_units = 'us-ft'
+            code = epsg_code(values['_EPSG_'][0], epsg_units)
+            lat, lng = sp_to_latlng(
+                float(values['EAST']), float(values['NORTH']), code)
+            ell_ht, geoid_offset_m, geoid_offset_ft = _heights(ll_ellipsoid_ht_calc, lat, lng, float(values['ELEV']), units)
+            window['OFFSET_M'].update(value=round(float(geoid_offset_m), 3))
+            window['OFFSET_FT'].update(value=round(float(geoid_offset_ft), 3))
+            window['Z'].update(value=round(float(ell_ht), 3))
+            window['Z_LABEL'].update(value='Ellipsoid Elevation m')
+            window['INDICATOR'].update(value=status[0])
+        except ValueError:
+            error = "No ESPG Code for {0} in survey feet.".format(
+                values['_EPSG_'][0])
+            window['INDICATOR'].update(value=error)
+            window['X'].update(value='')
+            window['Y'].update(value='')
+    elif values['_EPSG_'] and values['NORTH'] and values['EAST'] and values['NEZ_RADIO'] == True and values['ELL_RADIO'] ==True and values['ELEV']:
+        try:
+            if values['METERS_RADIO'] == True:
+                units = 'm'
+                epsg_units = 'm'
+            elif values['INT_FT_RADIO'] == True:
+                units = 'ft'
+                epsg_units = 'ft'
+            elif values['US_FT_RADIO'] == True:
+                units = 'us-ft'
+                epsg_units = 'us-ft'
+            code = epsg_code(values['_EPSG_'][0], epsg_units)
+            lat, lng = sp_to_latlng(
+                float(values['EAST']), float(values['NORTH']), code)
+            geoid_ht, geoid_offset_m, geoid_offset_ft = _heights(ll_geoid_ht_calc, lat, lng, float(values['ELEV']), units)
+            window['OFFSET_M'].update(value=round(float(geoid_offset_m), 3))
+            window['OFFSET_FT'].update(value=round(float(geoid_offset_ft), 3))
+            window['Z'].update(value=round(float(geoid_ht),2))
+            window['Z_LABEL'].update(value='Geoid Elevation ' + units)
+            window['INDICATOR'].update(value=status[0])
+        except ValueError:
+            error = "No ESPG Code for {0} in survey feet.".format(
+                values['_EPSG_'][0])
+            window['INDICATOR'].update(value=error)
+            window['X'].update(value='')
+            window['Y'].update(value='')
+    progress(100)
+
+
+class _Updates:
+    """ Element updates recorded off the GUI thread, applied with apply(). """
+
+    def __init__(self):
+        self.updates = {}
+
+    def __getitem__(self, key):
+        return _Element(self.updates.setdefault(key, {}))
+
+    def apply(self, window):
+        for key, kwargs in self.updates.items():
+            window[key].update(**kwargs)
+
+
+class _Element:
+
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+    def update(self, value=None, **kwargs):
+        self.kwargs.update(kwargs, value=value)
+
+
+def run_conversion(window, job, values, cancel):
+    # runs on a worker thread via perform_long_operation
+    updates = _Updates()
+    try:
+        convert(values, updates, cancel.is_set,
+                lambda pct: window.write_event_value('-PROGRESS-',
+                                                     (job, pct)))
+    except _InvalidPoint:
+        updates['INDICATOR'].update(value='invalid Lat, Lng')
+    except Exception as e:
+        # always hand a result back, so the GUI resets the progress bar
+        # and the Stop button
+        updates['INDICATOR'].update(value='Conversion failed: {0}'.format(e))
+    return job, updates
+
+
+def main():
+    window = make_window()
+    job = 0
+    cancel = None
+    warming = set()
+
+    while True:
+        event, values = window.read()
+        if event in (sg.WIN_CLOSED, 'Exit'):
+            break
+        if values['NEZ_RADIO'] == True:
+            window['CRS_SUB'].Update(value=crs_sub[1])
+            window['LAT'].Update(disabled=True)
+            window['LNG'].Update(disabled=True)
+            window['NORTH'].Update(disabled=False)
+            window['EAST'].Update(disabled=False)
+        if values['LATLONG_RADIO'] == True:
+            window['CRS_SUB'].Update(value=crs_sub[0])
+            window['LAT'].Update(disabled=False)
+            window['LNG'].Update(disabled=False)
+            window['NORTH'].Update(disabled=True)
+            window['EAST'].Update(disabled=True)
+
+        if event in ('LAT', 'LNG') and values['LATLONG_RADIO'] == True:
+            # load the tile for the coordinate being typed in the background
+            try:
+                lat, lng = float(values['LAT']), float(values['LNG'])
+                tile = int(tile_index(lat, lng))
+            except (ValueError, OSError):
+                # not a number yet, or no geoid tiles; the conversion
+                # itself reports the problem
+                pass
+            else:
+                if tile >= 0 and tile not in warming:
+                    warming.add(tile)
+                    threading.Thread(target=prewarm, args=(lat, lng),
+                                     daemon=True).start()
+
+        if event == 'Ok':
+            if cancel is not None:
+                cancel.set()
+            job += 1
+            cancel = threading.Event()
+            window['PROGRESS'].update(current_count=0, visible=True)
+            window['Stop'].update(disabled=False)
+            window.perform_long_operation(
+                functools.partial(run_conversion, window, job, dict(values),
+                                  cancel), '-CONVERTED-')
+
+        if event == '-PROGRESS-' and values[event][0] == job:
+            window['PROGRESS'].update(current_count=values[event][1])
+
+        if event == '-CONVERTED-':
+            done_job, updates = values[event]
+            if done_job == job and not cancel.is_set():
+                updates.apply(window)
+                window['PROGRESS'].update(visible=False)
+                window['Stop'].update(disabled=True)
+
+        if event == 'Stop' and cancel is not None:
+            cancel.set()
+            window['INDICATOR'].update(value='Conversion cancelled.')
+            window['PROGRESS'].update(visible=False)
+            window['Stop'].update(disabled=True)
+
+        if event == 'Reset':
+            window['LAT'].Update(value='')
+            window['LNG'].Update(value='')
+            window['NORTH'].Update(value='')
+            window['EAST'].Update(value='')
+            window['ELEV'].Update(value='')
+            window['OFFSET_M'].update(value='')
+            window['OFFSET_FT'].update(value='')
+            window['X'].update(value='')
+            window['Y'].update(value='')
+            window['Z'].update(value='')
+        if event == 'Cancel':
+            raise SystemExit
+    window.close()
@@ -0,0 +1,135 @@
+""" Opt-in timers and counters for the conversion pipeline.
+
+Turn on with enable() or by setting COORD_CONVERTER_PROFILE=1. While
+disabled, stage() hands back one shared no-op context manager and count()
+returns straight away, so the instrumented code pays next to nothing.
+
+    with stage('geoid.spline_build'):
+        ...
+    count('geoid.points', len(lat))
+
+snapshot() returns the numbers and the cache sizes as a dict. log_stats()
+writes them as one structured log record, and prometheus_text() renders
+them in the Prometheus text exposition format.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+enabled = os.environ.get('COORD_CONVERTER_PROFILE', '') not in ('', '0')
+
+# stage -> [calls, total seconds, max seconds]
+_timers = {}
+_counters = {}
+_lock = threading.Lock()
+_null = nullcontext()
+
+logger = logging.getLogger('coord_converter.instrument')
+
+
+def enable(flag=True):
+    global enabled
+    enabled = flag
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+class _Timer:
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            timer = _timers.get(self.name)
+            if timer is None:
+                _timers[self.name] = [1, elapsed, elapsed]
+            else:
+                timer[0] += 1
+                timer[1] += elapsed
+                timer[2] = max(timer[2], elapsed)
+        return False
+
+
+def stage(name):
+    if not enabled:
+        return _null
+    return _Timer(name)
+
+
+def count(name, n=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot():
+    from coord_converter import core
+
+    info = core.transformer_cache_info()
+    with _lock:
+        timers = {name: {'calls': calls, 'seconds': total, 'max': longest}
+                  for name, (calls, total, longest) in _timers.items()}
+        counters = dict(_counters)
+    stats = {
+        'timers': timers,
+        'counters': counters,
+        'caches': {
+            'tiles': len(core._grid_cache),
+            'splines': len(core._spline_cache),
+            'grid_bytes': core.grid_memory_used(),
+            'transformer_hits': info.hits,
+            'transformer_misses': info.misses,
+            'transformers': info.currsize,
+        },
+    }
+    results = core.result_cache_stats()
+    if results is not None:
+        stats['caches'].update(('result_' + name, value)
+                               for name, value in results.items()
+                               if value is not None)
+    return stats
+
+
+def log_stats(level=logging.INFO):
+    logger.log(level, json.dumps(snapshot(), sort_keys=True))
+
+
+def prometheus_text():
+    stats = snapshot()
+    lines = [
+        '# TYPE coord_converter_stage_seconds_total counter',
+        '# TYPE coord_converter_stage_calls_total counter',
+        '# TYPE coord_converter_stage_max_seconds gauge',
+    ]
+    for name, timer in sorted(stats['timers'].items()):
+        lines.append('coord_converter_stage_seconds_total{{stage="{0}"}} '
+                     '{1:.9f}'.format(name, timer['seconds']))
+        lines.append('coord_converter_stage_calls_total{{stage="{0}"}} '
+                     '{1}'.format(name, timer['calls']))
+        lines.append('coord_converter_stage_max_seconds{{stage="{0}"}} '
+                     '{1:.9f}'.format(name, timer['max']))
+    lines.append('# TYPE coord_converter_events_total counter')
+    for name, value in sorted(stats['counters'].items()):
+        lines.append('coord_converter_events_total{{event="{0}"}} '
+                     '{1}'.format(name, value))
+    lines.append('# TYPE coord_converter_cache gauge')
+    for name, value in sorted(stats['caches'].items()):
+        lines.append('coord_converter_cache{{cache="{0}"}} {1}'.format(
+            name, value))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,85 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from coord_converter.batch import default_columns, convert_points
+from coord_converter.core import geoid_mosaic, load_tile
+
+# Each worker process keeps its own tile and Transformer caches (see
+# coord_converter.core), so a worker loads a grid or builds a Transformer
+# at most once no matter how many shards it is handed.
+
+
+def make_executor(workers=None):
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _convert_shard(columns, kwargs):
+    return convert_points(columns, **kwargs)
+
+
+def _warm_tiles(columns, n, input_type, names):
+    # load the needed tiles here first, so a fresh checkout's .asc files are
+    # converted to .npy once instead of by every worker at the same moment;
+    # returns each row's tile
+    mosaic = geoid_mosaic()
+    if input_type == 'latlng':
+        tiles = mosaic.tile_index(columns[names['lat']], columns[names['lng']])
+        needed = np.unique(tiles[tiles >= 0])
+    else:
+        # the tile is only known after the horizontal transform
+        tiles = np.zeros(n, dtype=int)
+        needed = range(len(mosaic.ascFiles))
+    for i in needed:
+        load_tile(mosaic.ascFiles[i])
+    return tiles
+
+
+def _shards(columns, n, tiles, zone, units, names, shard_size):
+    # group row indices by (zone, units, geoid tile) and split large groups
+    # so the work spreads over every worker
+    zones = (np.zeros(n, dtype=int) if zone is not None
+             else np.unique(np.asarray(columns[names['zone']]).astype(str),
+                            return_inverse=True)[1])
+    unit_values = (np.zeros(n, dtype=int) if units is not None
+                   else np.unique(
+                       np.asarray(columns[names['units']]).astype(str),
+                       return_inverse=True)[1])
+    keys = np.stack([zones.ravel(), unit_values.ravel(), tiles.ravel()])
+    group = np.unique(keys, axis=1, return_inverse=True)[1].ravel()
+    order = np.argsort(group, kind='stable')
+    bounds = np.flatnonzero(np.diff(group[order])) + 1
+    for idx in np.split(order, bounds):
+        for start in range(0, len(idx), shard_size):
+            yield idx[start:start + shard_size]
+
+
+def convert_points_parallel(columns, executor, input_type='latlng',
+                            height='ellipsoid', zone=None, units=None,
+                            names=default_columns, method='spline',
+                            shard_size=50000):
+    """ convert_points across a process pool, results in input order. """
+    kwargs = {'input_type': input_type, 'height': height, 'zone': zone,
+              'units': units, 'names': names, 'method': method}
+    used = [column for column in names.values() if column in columns]
+    arrays = {column: np.asarray(columns[column]) for column in used}
+    n = len(arrays[names['lat' if input_type == 'latlng' else 'north']])
+    if n == 0:
+        return convert_points(arrays, **kwargs)
+
+    tiles = _warm_tiles(arrays, n, input_type, names)
+    shards = list(_shards(arrays, n, tiles, zone, units, names, shard_size))
+    futures = [executor.submit(_convert_shard,
+                               {column: values[idx]
+                                for column, values in arrays.items()},
+                               kwargs)
+               for idx in shards]
+
+    out = {}
+    for idx, future in zip(shards, futures):
+        for name, values in future.result().items():
+            if name not in out:
+                out[name] = (np.full(n, np.nan) if values.dtype.kind == 'f'
+                             else np.empty(n, dtype=object))
+            out[name][idx] = values
+    return out
@@ -0,0 +1,124 @@
+from functools import lru_cache
+
+import numpy as np
+
+from coord_converter.core import (epsg_code, geoid_height, get_transformer,
+                                  memoized, metres_per_unit, geoid_methods)
+from coord_converter.instrument import stage, count
+
+# Combined horizontal + vertical conversion.
+#
+# A Pipeline is built once per (zone, units, input type, height direction,
+# interpolation method). Building it resolves the EPSG code, Transformer and
+# unit scale. run() then converts whole arrays in one pass:
+#
+#   1. transform the horizontal coordinates (in place when allowed)
+#   2. look up the geoid offset at the resulting lat/lng
+#   3. apply the offset and unit scale to the heights with in-place ufuncs
+#
+# Heights follow the GUI convention: ellipsoid heights are in meters and
+# geoid (orthometric) heights are in the zone's units. units is 'm', 'ft'
+# (international foot) or 'us-ft' (US survey foot), and each uses its own
+# exact factor from core.metres_per_unit.
+#
+# Both lookups go through core.memoized, so the optional result cache is
+# used when it is turned on.
+
+
+class Pipeline:
+
+    def __init__(self, code, units, input_type='latlng', height='ellipsoid',
+                 method='spline'):
+        if input_type not in ('latlng', 'ne'):
+            raise ValueError("input_type must be 'latlng' or 'ne'")
+        if height not in ('ellipsoid', 'geoid'):
+            raise ValueError("height must be 'ellipsoid' or 'geoid'")
+        if method not in geoid_methods:
+            raise ValueError("unknown interpolation method {0!r}".format(
+                method))
+        if code is None and input_type == 'ne':
+            raise ValueError("northing/easting input needs an EPSG code")
+        self.code = code
+        self.units = units
+        self.input_type = input_type
+        self.height = height
+        self.method = method
+        self.scale = metres_per_unit[units]
+        self.transformer = None
+        if code is not None:
+            if input_type == 'latlng':
+                self.transformer = get_transformer(4326, code)
+            else:
+                self.transformer = get_transformer(code, 4326)
+
+    def _transform(self, a, b):
+        with stage('transformer.transform'):
+            return self.transformer.transform(a, b)
+
+    def _transform_inplace(self, a, b):
+        with stage('transformer.transform'):
+            return self.transformer.transform(a, b, inplace=True)
+
+    def run(self, a, b, h=None, copy=True):
+        """ Convert arrays of (lat, lng) or (north, east) and optional
+        heights (scalars come back as 1-element arrays). Returns
+        (x, y, z, geoid_offset_m), where (x, y) is (easting, northing) for
+        lat/lng input and (lat, lng) for northing/easting input. Without
+        heights the geoid is not looked up and z and geoid_offset_m are
+        None.
+
+        With copy=False, float64 inputs are overwritten with the results
+        instead of being copied.
+        """
+        take = np.array if copy else np.asarray
+        a = np.atleast_1d(take(a, dtype=float))
+        b = np.atleast_1d(take(b, dtype=float))
+        count('pipeline.points', a.size)
+
+        if self.input_type == 'latlng':
+            lat, lng = a, b
+            x = y = None
+            if self.transformer is not None:
+                # lat/lng are still needed for the geoid lookup, so the
+                # transform writes into new arrays
+                x, y = memoized('latlng_to_sp', self.code, lat, lng,
+                                self._transform)
+        else:
+            # sp_to_latlng takes easting first; the results replace the
+            # (already copied) inputs
+            lat, lng = memoized('sp_to_latlng', self.code, b, a,
+                                self._transform_inplace)
+            x, y = lat, lng
+
+        if h is None:
+            return x, y, None, None
+
+        offset = geoid_height(lat, lng, self.method)
+        z = np.atleast_1d(take(h, dtype=float))
+        if z.shape != offset.shape:
+            # one height for every point
+            z = np.array(np.broadcast_to(z, offset.shape))
+        if self.height == 'ellipsoid':
+            # ellipsoid meters -> geoid units
+            np.subtract(z, offset, out=z)
+            if self.scale != 1.0:
+                np.divide(z, self.scale, out=z)
+        else:
+            # geoid units -> ellipsoid meters
+            if self.scale != 1.0:
+                np.multiply(z, self.scale, out=z)
+            np.add(z, offset, out=z)
+        return x, y, z, offset
+
+
+@lru_cache(maxsize=64)
+def get_pipeline(code, units, input_type='latlng', height='ellipsoid',
+                 method='spline'):
+    return Pipeline(code, units, input_type, height, method)
+
+
+def pipeline_for(zone, units, input_type='latlng', height='ellipsoid',
+                 method='spline'):
+    # raises ValueError when the zone has no code in those units
+    return get_pipeline(epsg_code(zone, units), units, input_type, height,
+                        method)
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Memoized conversion results for points that are converted again and again
+# (benchmarks, control monuments).
+#
+# Entries are keyed by (kind, parameter, quantized a, quantized b). kind
+# names the conversion, and the parameter is its CRS, or the interpolation
+# method and GeoidMosaic.identity of the tiles for geoid heights.
+# Coordinates are rounded to a fixed number of decimals first, so re-typed
+# or re-exported copies of a point land on the same key. The in-memory store is a bounded LRU. When a path is given, results are also
+# written through to a SQLite file and read back from it on a memory miss,
+# so they survive across runs. Each process opens its own connection on
+# first use, a connection is never shared with forked worker processes.
+
+# quantized coordinates must fit in an int64 key
+_key_limit = 2.0 ** 62
+
+
+class ResultCache:
+
+    def __init__(self, maxsize=100000, path=None):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path = path
+        self._db = None
+        self._db_pid = None
+
+    def _connection(self):
+        # the SQLite connection of this process, None without a path
+        if self.path is None:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            # a connection inherited through fork must not be used
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS results '
+                             '(key TEXT PRIMARY KEY, value TEXT)')
+            self._db_pid = os.getpid()
+        return self._db
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'size': len(self.entries),
+                'hit_rate': ((self.hits + self.disk_hits) / lookups
+                             if lookups else None)}
+
+    def _store(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def _load(self, keys):
+        # persisted results for keys, as {key: value}
+        found = {}
+        names = {repr(key): key for key in keys}
+        texts = list(names)
+        for start in range(0, len(texts), 500):
+            part = texts[start:start + 500]
+            rows = self._connection().execute(
+                'SELECT key, value FROM results WHERE key IN ({0})'.format(
+                    ','.join('?' * len(part))), part)
+            for text, value in rows:
+                found[names[text]] = tuple(float(v) for v in value.split())
+        return found
+
+    def _save(self, items):
+        db = self._connection()
+        db.executemany(
+            'INSERT OR REPLACE INTO results VALUES (?, ?)',
+            [(repr(key), ' '.join(repr(v) for v in value))
+             for key, value in items])
+        db.commit()
+
+    def lookup_one(self, kind, param, a, b, compute, decimals):
+        # single point fast path of lookup(), without the array work
+        scale = 10.0 ** decimals
+        if abs(a) < _key_limit / scale and abs(b) < _key_limit / scale:
+            key = (kind, param, round(a * scale), round(b * scale))
+            with self._lock:
+                value = self.entries.get(key)
+                if value is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+        return tuple(float(r[0]) for r in self.lookup(
+            kind, param, np.array([a]), np.array([b]), compute, decimals))
+
+    def lookup(self, kind, param, a, b, compute, decimals):
+        """ Results for 1-d arrays a and b, calling compute(a, b) -> tuple
+        of arrays only for the points that are not cached yet. """
+        limit = _key_limit / 10.0 ** decimals
+        keyable = (np.abs(a) < limit) & (np.abs(b) < limit)
+        if not keyable.all():
+            # nan, inf and huge values have no integer key, they are
+            # computed every time and never stored
+            direct = compute(a[~keyable], b[~keyable])
+            cached = (self.lookup(kind, param, a[keyable], b[keyable],
+                                  compute, decimals)
+                      if keyable.any() else [None] * len(direct))
+            results = []
+            for d, c in zip(direct, cached):
+                column = np.empty(a.shape)
+                column[~keyable] = d
+                if c is not None:
+                    column[keyable] = c
+                results.append(column)
+            return tuple(results)
+
+        qa = np.rint(a * 10.0 ** decimals).astype(np.int64).tolist()
+        qb = np.rint(b * 10.0 ** decimals).astype(np.int64).tolist()
+        keys = [(kind, param, x, y) for x, y in zip(qa, qb)]
+
+        values = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self.entries.get(key)
+                if value is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    values[i] = value
+            missing = [i for i, value in enumerate(values) if value is None]
+            if missing and self.path is not None:
+                found = self._load({keys[i] for i in missing})
+                for i in missing:
+                    if keys[i] in found:
+                        values[i] = found[keys[i]]
+                        self._store(keys[i], values[i])
+                        self.disk_hits += 1
+                missing = [i for i in missing if values[i] is None]
+
+        if missing:
+            # repeats of a point within one call are computed once
+            pending = {}
+            for i in missing:
+                pending.setdefault(keys[i], []).append(i)
+            index = np.array([rows[0] for rows in pending.values()])
+            computed = compute(a[index], b[index])
+            computed = [np.broadcast_to(np.asarray(c, dtype=float),
+                                        index.shape) for c in computed]
+            new = {}
+            for k, (key, rows) in enumerate(pending.items()):
+                new[key] = tuple(float(c[k]) for c in computed)
+                for i in rows:
+                    values[i] = new[key]
+            with self._lock:
+                self.misses += len(new)
+                self.hits += len(missing) - len(new)
+                for key, value in new.items():
+                    self._store(key, value)
+                if self.path is not None:
+                    self._save(new.items())
+
+        return tuple(np.array(column, dtype=float)
+                     for column in zip(*values)) if values else ()
+
+    def close(self):
+        if self._db is not None and self._db_pid == os.getpid():
+            self._db.close()
+        self._db = None
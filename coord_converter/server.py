@@ -0,0 +1,227 @@
+import asyncio
+import json
+import time
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from coord_converter import instrument
+from coord_converter.core import (epsg_code, geoid_height, geoid_mosaic,
+                                  latlng_to_sp, sp_to_latlng,
+                                  result_cache_stats, transformer_cache_info)
+
+# Local HTTP conversion service.
+#
+#   GET /geoid?lat=&lng=[&method=]                  geoid offset in meters
+#   GET /to_sp?lat=&lng=&zone=&units=               easting, northing
+#   GET /to_latlng?north=&east=&zone=&units=        lat, lng
+#   GET /stats                                      latency and batch stats
+#   GET /metrics                                    Prometheus text, see
+#                                                   coord_converter.instrument
+#
+# POST with a JSON object body takes the same parameters. Concurrent
+# requests for the same kind of conversion are gathered for up to max_delay
+# seconds and evaluated as one array, so the tile grids and Transformers
+# (kept warm in coord_converter.core) are used once per batch instead of
+# once per point.
+
+
+class MicroBatcher:
+
+    def __init__(self, max_delay=0.002, max_batch=4096):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.pending = {}
+        self.batch_sizes = deque(maxlen=10000)
+
+    def submit(self, key, a, b):
+        # queue one point under key, returns a future for its result
+        future = asyncio.get_running_loop().create_future()
+        if key not in self.pending:
+            self.pending[key] = []
+            asyncio.get_running_loop().call_later(
+                self.max_delay, self._flush, key)
+        self.pending[key].append((a, b, future))
+        if len(self.pending[key]) >= self.max_batch:
+            self._flush(key)
+        return future
+
+    def _flush(self, key):
+        items = self.pending.pop(key, None)
+        if items:
+            asyncio.get_running_loop().create_task(self._run(key, items))
+
+    async def _run(self, key, items):
+        self.batch_sizes.append(len(items))
+        a = np.array([item[0] for item in items], dtype=float)
+        b = np.array([item[1] for item in items], dtype=float)
+        try:
+            # the numeric work runs in a thread to keep the loop responsive
+            results = await asyncio.get_running_loop().run_in_executor(
+                None, evaluate, key, a, b)
+        except Exception as e:
+            for item in items:
+                if not item[2].done():
+                    item[2].set_exception(e)
+            return
+        for k, item in enumerate(items):
+            if not item[2].done():
+                item[2].set_result(tuple(float(r[k]) for r in results))
+
+
+def evaluate(key, a, b):
+    kind, arg = key
+    if kind == 'geoid':
+        return (geoid_height(a, b, arg),)
+    if kind == 'to_sp':
+        return latlng_to_sp(a, b, arg)
+    if kind == 'to_latlng':
+        # sp_to_latlng takes easting first
+        return sp_to_latlng(b, a, arg)
+    raise ValueError(kind)
+
+
+def _number(value):
+    # JSON has no nan or infinity, points that convert to them get null
+    return value if np.isfinite(value) else None
+
+
+class ConversionServer:
+
+    def __init__(self, max_delay=0.002, max_batch=4096):
+        self.batcher = MicroBatcher(max_delay, max_batch)
+        self.latencies = deque(maxlen=10000)
+        self.requests = 0
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000
+        sizes = np.array(self.batcher.batch_sizes)
+        info = transformer_cache_info()
+        return {
+            'requests': self.requests,
+            'latency_ms_p50': (float(np.percentile(latencies, 50))
+                               if len(latencies) else None),
+            'latency_ms_p99': (float(np.percentile(latencies, 99))
+                               if len(latencies) else None),
+            'batches': len(sizes),
+            'mean_batch_size': float(sizes.mean()) if len(sizes) else None,
+            'transformer_cache': {'hits': info.hits, 'misses': info.misses,
+                                  'size': info.currsize},
+            'result_cache': result_cache_stats(),
+        }
+
+    async def convert(self, path, params):
+        if path == '/stats':
+            return self.stats()
+        if path == '/metrics':
+            return instrument.prometheus_text()
+        if path == '/geoid':
+            (ht,) = await self.batcher.submit(
+                ('geoid', params.get('method', 'spline')),
+                float(params['lat']), float(params['lng']))
+            return {'geoid_offset_m': _number(ht)}
+
+        code = epsg_code(params['zone'], params.get('units', 'm'))
+        if path == '/to_sp':
+            east, north = await self.batcher.submit(
+                ('to_sp', code), float(params['lat']), float(params['lng']))
+            return {'easting': _number(east), 'northing': _number(north),
+                    'epsg': code}
+        if path == '/to_latlng':
+            lat, lng = await self.batcher.submit(
+                ('to_latlng', code), float(params['north']),
+                float(params['east']))
+            return {'lat': _number(lat), 'lng': _number(lng), 'epsg': code}
+        raise LookupError(path)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                parts = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if len(parts) < 2:
+                    # can't tell where the next request starts, so close
+                    await self._write(writer, '400 Bad Request',
+                                      {'error': 'bad request line'})
+                    break
+                method, target = parts[:2]
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    await self._write(writer, '400 Bad Request',
+                                      {'error': 'bad Content-Length'})
+                    break
+                body = b''
+                if length > 0:
+                    body = await reader.readexactly(length)
+
+                start = time.perf_counter()
+                status, payload = await self._respond(method, target, body)
+                if status == '200 OK':
+                    self.requests += 1
+                    self.latencies.append(time.perf_counter() - start)
+
+                await self._write(writer, status, payload)
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write(self, writer, status, payload):
+        if isinstance(payload, str):
+            data = payload.encode()
+            content_type = 'text/plain; version=0.0.4'
+        else:
+            data = json.dumps(payload).encode()
+            content_type = 'application/json'
+        writer.write(
+            'HTTP/1.1 {0}\r\nContent-Type: {1}\r\n'
+            'Content-Length: {2}\r\n\r\n'.format(
+                status, content_type, len(data)).encode() + data)
+        await writer.drain()
+
+    async def _respond(self, method, target, body):
+        url = urlsplit(target)
+        params = {key: values[-1]
+                  for key, values in parse_qs(url.query).items()}
+        try:
+            if method == 'POST' and body:
+                fields = json.loads(body)
+                if not isinstance(fields, dict):
+                    raise ValueError('request body must be a JSON object')
+                params.update(fields)
+            return '200 OK', await self.convert(url.path, params)
+        except LookupError as e:
+            if url.path in ('/stats', '/geoid', '/to_sp', '/to_latlng'):
+                return '400 Bad Request', {'error': 'missing {0}'.format(e)}
+            return '404 Not Found', {'error': 'unknown path'}
+        except (ValueError, TypeError) as e:
+            # bad values, e.g. a non-numeric or null coordinate
+            return '400 Bad Request', {'error': str(e)}
+        except Exception as e:
+            # e.g. missing tile files, the connection stays usable
+            return '500 Internal Server Error', {'error': str(e)}
+
+
+async def serve(host='127.0.0.1', port=8035, unix=None, max_delay=0.002):
+    server = ConversionServer(max_delay=max_delay)
+    # read the tile headers before the first request
+    geoid_mosaic()
+    if unix is not None:
+        listener = await asyncio.start_unix_server(server.handle, unix)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+    async with listener:
+        await listener.serve_forever()
@@ -0,0 +1,193 @@
+import numpy as np
+
+from coord_converter.core import epsg_labels, load_epsg_table, resource_path
+
+# Automatic StatePlane zone detection for lat/lng points.
+#
+# Zone boundaries come from spcs83-zones.npz: the county outlines each zone
+# is made of, simplified to about 100 m (see tools/build_zone_boundaries.py).
+# The rings are bucketed into a grid of cell_size degree cells, so a point
+# is only tested against the few rings whose extent touches its cell, never
+# against every zone. A point is in a zone when it is inside an odd number
+# of the zone's rings (holes are rings too). Where simplified outlines of
+# neighbouring zones overlap, the first zone wins.
+#
+# Points in the gaps between simplified outlines, or just off the coast,
+# fall back to the area of use PROJ records for each EPSG code. Those are
+# bounding boxes that overlap along state and zone lines, so the fallback
+# only resolves a point when exactly one box contains it. Other points stay
+# unresolved ('') rather than being guessed, so they get no XY output
+# instead of coordinates in the wrong zone.
+#
+# A statewide zone ('KY Single') covers the same ground as its state's
+# split zones. It is left out of detection, so the split zones are the
+# state's default. Pass the zone explicitly to use the statewide one.
+
+# points per block in the point-in-polygon test, bounds the
+# (points x edges) temporaries
+_block_size = 2 ** 20
+
+
+class ZoneIndex:
+
+    def __init__(self, cell_size=1.0):
+        from pyproj import CRS
+
+        table = load_epsg_table()
+        labels = []
+        bounds = []
+        labels_all = epsg_labels()
+        states = [label.split()[0] for label in labels_all]
+        for label in labels_all:
+            if label.endswith(' Single') and states.count(
+                    label.split()[0]) > 1:
+                continue
+            codes = [table[(label, units)] for units in ('m', 'us-ft', 'ft')]
+            code = next(code for code in codes if code is not None)
+            area = CRS(code).area_of_use
+            if area is None:
+                continue
+            labels.append(label)
+            bounds.append(area.bounds)
+
+        self.labels = np.array(labels + [''], dtype=object)
+        west, south, east, north = np.array(bounds, dtype=float).T
+        self.west, self.south, self.east, self.north = west, south, east, north
+        self.cell_size = cell_size
+        self.lng0 = west.min()
+        self.lat0 = south.min()
+        self.ncols = int(np.ceil((east.max() - self.lng0) / cell_size)) + 1
+        self.nrows = int(np.ceil((north.max() - self.lat0) / cell_size)) + 1
+
+        # cell id -> indices of the zones whose extent touches that cell
+        buckets = {}
+        for i in range(len(labels)):
+            c0, c1 = self._cols(west[i]), self._cols(east[i])
+            r0, r1 = self._rows(south[i]), self._rows(north[i])
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    buckets.setdefault(row * self.ncols + col, []).append(i)
+        self.buckets = {cell: np.array(zones)
+                        for cell, zones in buckets.items()}
+
+        # zone boundary rings, bucketed the same way
+        with np.load(resource_path('spcs83-zones.npz')) as data:
+            zone_of = {label: i for i, label in enumerate(labels)}
+            self.ring_zone = np.array([zone_of[str(label)] for label
+                                       in data['labels']])[data['ring_zone']]
+            offsets = data['ring_offsets']
+            coords = data['coords'].astype(float)
+        self.rings = np.split(coords, offsets[1:-1])
+        ring_bounds = np.array([(ring[:, 0].min(), ring[:, 1].min(),
+                                 ring[:, 0].max(), ring[:, 1].max())
+                                for ring in self.rings])
+        self.ring_bounds = ring_bounds
+        ring_buckets = {}
+        for i, (w, s, e, n) in enumerate(ring_bounds):
+            c0, c1 = np.clip(self._cols([w, e]), 0, self.ncols - 1)
+            r0, r1 = np.clip(self._rows([s, n]), 0, self.nrows - 1)
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    ring_buckets.setdefault(row * self.ncols + col,
+                                            []).append(i)
+        self.ring_buckets = {cell: np.array(rings)
+                             for cell, rings in ring_buckets.items()}
+
+    def _cols(self, lng):
+        return np.floor((np.asarray(lng) - self.lng0)
+                        / self.cell_size).astype(int)
+
+    def _rows(self, lat):
+        return np.floor((np.asarray(lat) - self.lat0)
+                        / self.cell_size).astype(int)
+
+    def _in_polygons(self, lat, lng, candidates):
+        # zone index of each point, -1 outside every candidate ring
+        zones = np.unique(self.ring_zone[candidates])
+        column = np.searchsorted(zones, self.ring_zone[candidates])
+        odd = np.zeros((len(lat), len(zones)), dtype=bool)
+        for ring, col in zip(candidates, column):
+            w, s, e, n = self.ring_bounds[ring]
+            near = np.flatnonzero((w <= lng) & (lng <= e)
+                                  & (s <= lat) & (lat <= n))
+            if not near.size:
+                continue
+            x0, y0 = self.rings[ring][:-1].T
+            x1, y1 = self.rings[ring][1:].T
+            step = max(1, _block_size // len(x0))
+            for start in range(0, near.size, step):
+                idx = near[start:start + step]
+                p_lng = lng[idx][:, None]
+                p_lat = lat[idx][:, None]
+                # even-odd rule: count edge crossings of a ray towards +lng
+                spans = (y0 > p_lat) != (y1 > p_lat)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    cross_lng = x0 + (p_lat - y0) * (x1 - x0) / (y1 - y0)
+                crossings = np.count_nonzero(spans & (p_lng < cross_lng),
+                                             axis=1)
+                odd[idx, col] ^= (crossings % 2).astype(bool)
+        found = odd.any(axis=1)
+        return np.where(found, zones[np.argmax(odd, axis=1)], -1)
+
+    def resolve(self, lat, lng):
+        """ Zone label for each point, '' where it is outside every zone
+        outline and not covered by exactly one zone's area of use. """
+        lat, lng = np.broadcast_arrays(np.asarray(lat, dtype=float),
+                                       np.asarray(lng, dtype=float))
+        shape = lat.shape
+        lat = lat.ravel()
+        lng = lng.ravel()
+
+        rows = self._rows(lat)
+        cols = self._cols(lng)
+        inside = ((rows >= 0) & (rows < self.nrows)
+                  & (cols >= 0) & (cols < self.ncols))
+        cells = np.where(inside, rows * self.ncols + cols, -1)
+
+        zone = np.full(lat.shape, len(self.labels) - 1)
+        order = np.argsort(cells, kind='stable')
+        unique, starts = np.unique(cells[order], return_index=True)
+        for cell, idx in zip(unique, np.split(order, starts[1:])):
+            p_lat = lat[idx]
+            p_lng = lng[idx]
+
+            rings = self.ring_buckets.get(cell)
+            if rings is not None:
+                found = self._in_polygons(p_lat, p_lng, rings)
+                zone[idx[found >= 0]] = found[found >= 0]
+                idx = idx[found < 0]
+                p_lat = p_lat[found < 0]
+                p_lng = p_lng[found < 0]
+
+            candidates = self.buckets.get(cell)
+            if candidates is None or not idx.size:
+                continue
+            p_lat = p_lat[:, None]
+            p_lng = p_lng[:, None]
+            west = self.west[candidates]
+            east = self.east[candidates]
+            south = self.south[candidates]
+            north = self.north[candidates]
+
+            # zones whose box contains the point, edges included
+            contains = ((west <= p_lng) & (p_lng <= east)
+                        & (south <= p_lat) & (p_lat <= north))
+            found = contains.sum(axis=1) == 1
+            zone[idx[found]] = candidates[np.argmax(contains[found], axis=1)]
+
+        return self.labels[zone].reshape(shape)
+
+
+_zone_index = None
+
+
+def zone_index():
+    # the index is built on first use and shared by every caller
+    global _zone_index
+    if _zone_index is None:
+        _zone_index = ZoneIndex()
+    return _zone_index
+
+
+def resolve_zones(lat, lng):
+    return zone_index().resolve(lat, lng)
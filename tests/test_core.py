@@ -0,0 +1,154 @@
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from coord_converter import core  # noqa: E402
+from coord_converter.pipeline import pipeline_for  # noqa: E402
+
+# the benchmark suite's synthetic GEOID-format tiles: same layout and
+# overlaps as the real ones, with a known surface
+_spec = importlib.util.spec_from_file_location(
+    'bench_conversions',
+    os.path.join(root, 'benchmarks', 'bench_conversions.py'))
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+SPACING = 0.25
+
+
+@pytest.fixture(scope='module', autouse=True)
+def synthetic_tiles(tmp_path_factory):
+    paths = bench.write_synthetic_tiles(str(tmp_path_factory.mktemp('tiles')),
+                                        SPACING)
+    core.clear_caches()
+    core.set_geoid_mosaic(core.GeoidMosaic(paths))
+    yield paths
+    core.disable_result_cache()
+    core.set_geoid_mosaic(None)
+    core.clear_caches()
+
+
+@pytest.fixture
+def uncached_then_cached():
+    # call(fn) -> fn() with the result cache off, then twice with it on
+    def call(fn):
+        core.disable_result_cache()
+        results = [fn()]
+        core.enable_result_cache()
+        results += [fn(), fn()]
+        return results
+    yield call
+    core.disable_result_cache()
+
+
+def test_tile_edges():
+    # lat 40 is the bottom edge of u1 and inside u5; lat 58 is u1's top
+    lat = np.array([40.0, 40.0, 58.0, 58.0 + SPACING, 24.0, 41.0])
+    lng = np.array([-120.0, -129.0, -120.0, -120.0, -120.0, -120.0])
+    assert core.tile_index(lat, lng).tolist() == [0, 0, 0, -1, 4, 0]
+    assert core.tile_index(40.0, -120.0) == 0
+
+
+@pytest.mark.parametrize('method', core.geoid_methods)
+def test_heights_at_tile_edges(method):
+    # grid nodes on the edges, every method reproduces the tile values
+    lat = np.array([40.0, 58.0, 40.0, 42.0, 24.0])
+    lng = np.array([-120.0, -120.0, -100.0, -80.0, -85.0])
+    ht = core.geoid_height(lat, lng, method)
+    np.testing.assert_allclose(ht, bench.synthetic_surface(lat, lng),
+                               atol=1e-4)
+
+
+def test_longitude_overlap():
+    # u1 covers -130..-111 and u2 -113..-94; the first tile owns the
+    # overlap, edges included
+    lat = np.full(5, 45.0)
+    lng = np.array([-113.0, -112.0, -111.0, -111.0 + SPACING, -94.0])
+    assert core.tile_index(lat, lng).tolist() == [0, 0, 0, 1, 1]
+
+    lng = np.linspace(-113.5, -110.5, 61)
+    lat = np.full(lng.shape, 45.1)
+    ht = core.geoid_height(lat, lng)
+    np.testing.assert_allclose(ht, bench.synthetic_surface(lat, lng),
+                               atol=1e-3)
+
+
+def test_out_of_grid_points():
+    assert core.tile_index(23.0, -100.0) == -1
+    assert np.isnan(core.geoid_height(np.array([23.0]),
+                                      np.array([-100.0]))).all()
+    assert core.geoid_height(float('nan'), -100.0) is None
+
+
+def _sample(n=500, seed=1):
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(39.5, 42.0, n)
+    lng = rng.uniform(-113.5, -110.5, n)
+    lat[:3] = [40.0, np.nan, 1e300]
+    return lat, lng
+
+
+@pytest.mark.parametrize('method', core.geoid_methods)
+def test_result_cache_matches_uncached(method, uncached_then_cached):
+    lat, lng = _sample()
+    expected, first, second = uncached_then_cached(
+        lambda: core.geoid_height(lat, lng, method))
+    np.testing.assert_array_equal(first, expected)
+    np.testing.assert_array_equal(second, expected)
+    assert core.result_cache_stats()['hits'] > 0
+    assert core.geoid_height(float(lat[5]), float(lng[5]), method) \
+        == expected[5]
+
+
+def test_result_cache_pipeline(uncached_then_cached):
+    lat, lng = _sample()
+    pipeline = pipeline_for('UT Central', 'us-ft')
+    expected, first, second = uncached_then_cached(
+        lambda: pipeline.run(lat, lng, 100.0))
+    for got in (first, second):
+        for column, want in zip(got, expected):
+            np.testing.assert_array_equal(column, want)
+
+
+@pytest.mark.parametrize('units', ['m', 'ft', 'us-ft'])
+def test_pipeline_round_trip(units):
+    lat, lng = _sample()
+    lat, lng = lat[3:], lng[3:]
+    ell = np.linspace(-50.0, 3000.0, lat.size)
+    east, north, geoid_ht, offset = pipeline_for(
+        'UT Central', units).run(lat, lng, ell)
+    np.testing.assert_allclose(
+        geoid_ht * core.metres_per_unit[units], ell - offset, atol=1e-9)
+
+    lat2, lng2, ell2, offset2 = pipeline_for(
+        'UT Central', units, 'ne', 'geoid').run(north, east, geoid_ht)
+    np.testing.assert_allclose(lat2, lat, atol=1e-9)
+    np.testing.assert_allclose(lng2, lng, atol=1e-9)
+    np.testing.assert_allclose(ell2, ell, atol=1e-6)
+    np.testing.assert_allclose(offset2, offset, atol=1e-6)
+
+
+def test_units_agree():
+    lat, lng = np.array([40.5, 41.2]), np.array([-111.9, -112.4])
+    heights = {}
+    for units in ['m', 'ft', 'us-ft']:
+        _, _, heights[units], _ = pipeline_for('UT Central', units).run(
+            lat, lng, 1500.0)
+    np.testing.assert_allclose(heights['ft'], heights['m'] / 0.3048)
+    np.testing.assert_allclose(heights['us-ft'], heights['m'] * 3937 / 1200)
+
+
+def test_ne_wrappers_match_pipeline():
+    code = core.epsg_code('UT Central', 'ft')
+    east, north = core.latlng_to_sp(40.5, -111.9, code)
+    geoid_ht = core.ne_geoid_ht_calc(north, east, 1500.0, code, 'ft')
+    expected, _, _ = core.ll_geoid_ht_calc(40.5, -111.9, 1500.0, 'ft')
+    assert geoid_ht == pytest.approx(expected, abs=1e-6)
+    assert core.ne_ellipsoid_ht_calc(north, east, geoid_ht, code, 'ft') \
+        == pytest.approx(1500.0, abs=1e-6)
@@ -0,0 +1,251 @@
+""" Build spcs83-zones.npz, the StatePlane zone boundaries used by
+coord_converter.zones.
+
+NAD83 StatePlane zones follow county lines. The county list of each zone is
+taken from the area of use PROJ records for its EPSG code, and the county
+outlines from the US Census Bureau cartographic boundary file
+cb_2016_us_county_500k (public domain). Washington's Grant county, the one
+county split between two zones, is cut at the 47°30'N line PROJ gives.
+
+Rings are simplified with Douglas-Peucker to --tolerance degrees and stored
+as float32 lng/lat. Each ring keeps the index of its zone label.
+
+    python tools/build_zone_boundaries.py path/to/cb_2016_us_county_500k
+
+The shapefile ships in the plotly-geo wheel (_plotly_geo/package_data).
+"""
+import argparse
+import os
+import re
+import struct
+import sys
+import unicodedata
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coord_converter.core import epsg_labels, load_epsg_table  # noqa: E402
+
+STATE_FP = {
+    'AL': '01', 'AZ': '04', 'AR': '05', 'CA': '06', 'CO': '08', 'CT': '09',
+    'DE': '10', 'FL': '12', 'GA': '13', 'ID': '16', 'IL': '17', 'IN': '18',
+    'IA': '19', 'KS': '20', 'KY': '21', 'LA': '22', 'ME': '23', 'MD': '24',
+    'MA': '25', 'MI': '26', 'MN': '27', 'MS': '28', 'MO': '29', 'MT': '30',
+    'NE': '31', 'NV': '32', 'NH': '33', 'NJ': '34', 'NM': '35', 'NY': '36',
+    'NC': '37', 'ND': '38', 'OH': '39', 'OK': '40', 'OR': '41', 'PA': '42',
+    'RI': '44', 'SC': '45', 'SD': '46', 'TN': '47', 'TX': '48', 'UT': '49',
+    'VT': '50', 'VA': '51', 'WA': '53', 'WV': '54', 'WI': '55', 'WY': '56',
+}
+
+# PROJ county names that are spelled differently by the Census Bureau, or
+# counties that have been renamed since
+RENAMED = {'dade': 'miamidade', 'mountrial': 'mountrail',
+           'shannon': 'oglalalakota'}
+
+
+def normalize(name):
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore')
+    name = name.decode().lower().replace('saint ', 'st ').replace('sainte ', 'ste ')
+    name = re.sub(r'\b(county|parish|city)\b', '', name)
+    name = re.sub(r'[^a-z]', '', name)
+    return RENAMED.get(name, name)
+
+
+def read_dbf(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    count, header, length = struct.unpack('<4xIHH', data[:12])
+    fields = []
+    pos = 32
+    while data[pos] != 0x0D:
+        name = data[pos:pos + 11].split(b'\0')[0].decode()
+        fields.append((name, data[pos + 16]))
+        pos += 32
+    records = []
+    for i in range(count):
+        record = data[header + i * length:header + (i + 1) * length]
+        pos = 1
+        values = {}
+        for name, size in fields:
+            values[name] = record[pos:pos + size].decode('utf-8').strip()
+            pos += size
+        records.append(values)
+    return records
+
+
+def read_polygons(path):
+    # list of rings (n x 2 arrays) for each polygon record
+    with open(path, 'rb') as f:
+        data = f.read()
+    shapes = []
+    pos = 100
+    while pos < len(data):
+        length = struct.unpack('>I', data[pos + 4:pos + 8])[0] * 2
+        content = data[pos + 8:pos + 8 + length]
+        pos += 8 + length
+        shape_type = struct.unpack('<i', content[:4])[0]
+        if shape_type == 0:
+            shapes.append([])
+            continue
+        nparts, npoints = struct.unpack('<ii', content[36:44])
+        parts = list(struct.unpack('<{0}i'.format(nparts),
+                                   content[44:44 + 4 * nparts]))
+        start = 44 + 4 * nparts
+        points = np.frombuffer(content[start:start + 16 * npoints],
+                               dtype='<f8').reshape(-1, 2)
+        bounds = parts + [npoints]
+        shapes.append([points[bounds[i]:bounds[i + 1]]
+                       for i in range(nparts)])
+    return shapes
+
+
+def simplify(ring, tolerance):
+    # Douglas-Peucker, keeping the closing vertex
+    keep = np.zeros(len(ring), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(ring) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = ring[first], ring[last]
+        segment = b - a
+        points = ring[first + 1:last] - a
+        norm = np.hypot(*segment)
+        if norm == 0:
+            distance = np.hypot(points[:, 0], points[:, 1])
+        else:
+            distance = np.abs(segment[0] * points[:, 1]
+                              - segment[1] * points[:, 0]) / norm
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            middle = first + 1 + i
+            keep[middle] = True
+            stack.append((first, middle))
+            stack.append((middle, last))
+    return ring[keep]
+
+
+def clip_latitude(ring, lat, keep_north):
+    # the part of a ring north or south of a parallel (Sutherland-Hodgman)
+    inside = (ring[:, 1] >= lat) if keep_north else (ring[:, 1] <= lat)
+    out = []
+    for i in range(len(ring) - 1):
+        p, q = ring[i], ring[i + 1]
+        if inside[i]:
+            out.append(p)
+        if inside[i] != inside[i + 1]:
+            t = (lat - p[1]) / (q[1] - p[1])
+            out.append(p + t * (q - p))
+    if not out:
+        return None
+    out.append(out[0])
+    return np.array(out)
+
+
+def zone_counties():
+    # label -> [(county name, split)], split is None or (lat, keep_north)
+    from pyproj import CRS
+
+    table = load_epsg_table()
+    zones = {}
+    for label in epsg_labels():
+        if label.endswith(' Single'):
+            continue
+        code = next(table[(label, units)] for units in ('m', 'us-ft', 'ft')
+                    if table[(label, units)] is not None)
+        name = CRS(code).area_of_use.name
+        match = re.search(r'counties(?: of)?:?\s*(.*)$', name)
+        if match is None:
+            raise ValueError('no county list for {0}: {1}'.format(label, name))
+        counties = []
+        for county in match.group(1).rstrip('.').split(';'):
+            county = county.strip()
+            split = re.match(r"(.+?) (north|south) of approximately "
+                             r"(\d+)°(\d+)'N", county)
+            if split:
+                county = split.group(1)
+                split = (int(split.group(3)) + int(split.group(4)) / 60,
+                         split.group(2) == 'north')
+            counties.append((county, split))
+        zones[label] = counties
+    return zones
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('shapefile', help='path without extension')
+    parser.add_argument('--tolerance', type=float, default=0.001)
+    parser.add_argument('--output', default=os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'spcs83-zones.npz'))
+    args = parser.parse_args()
+
+    records = read_dbf(args.shapefile + '.dbf')
+    shapes = read_polygons(args.shapefile + '.shp')
+    by_name = {}
+    for record, rings in zip(records, shapes):
+        key = (record['STATEFP'], normalize(record['NAME']))
+        by_name.setdefault(key, []).extend(rings)
+
+    zones = zone_counties()
+    labels = sorted(zones)
+    ring_zone = []
+    rings = []
+    used = set()
+    missing = []
+    for z, label in enumerate(labels):
+        state = STATE_FP[label.split()[0]]
+        for county, split in zones[label]:
+            key = (state, normalize(county))
+            if key not in by_name:
+                missing.append((label, county))
+                continue
+            used.add(key)
+            for ring in by_name[key]:
+                if split is not None:
+                    ring = clip_latitude(ring, *split)
+                    if ring is None:
+                        continue
+                ring = simplify(ring, args.tolerance)
+                if len(ring) >= 4:
+                    rings.append(ring)
+                    ring_zone.append(z)
+
+    if missing:
+        raise KeyError('counties not found: {0}'.format(missing))
+
+    # counties PROJ leaves out (Virginia's independent cities, Broomfield,
+    # Carson City) go to the zone of the nearest listed county in the state
+    states = {STATE_FP[label.split()[0]] for label in labels}
+    unused = sorted(key for key in by_name
+                    if key[0] in states and key not in used)
+    ring_state = [STATE_FP[labels[z].split()[0]] for z in ring_zone]
+    for key in unused:
+        candidates = [i for i, state in enumerate(ring_state)
+                      if state == key[0]]
+        centre = np.concatenate(by_name[key]).mean(axis=0)
+        nearest = min(candidates, key=lambda i: np.hypot(
+            *(rings[i] - centre).T).min())
+        for ring in by_name[key]:
+            ring = simplify(ring, args.tolerance)
+            if len(ring) >= 4:
+                rings.append(ring)
+                ring_zone.append(ring_zone[nearest])
+        print('{0} {1} -> {2}'.format(key[0], key[1],
+                                      labels[ring_zone[nearest]]),
+              file=sys.stderr)
+
+    offsets = np.cumsum([0] + [len(ring) for ring in rings])
+    np.savez_compressed(
+        args.output, labels=np.array(labels),
+        ring_zone=np.array(ring_zone, dtype=np.int16),
+        ring_offsets=offsets.astype(np.int32),
+        coords=np.concatenate(rings).astype(np.float32))
+    print('{0} zones, {1} rings, {2} vertices -> {3}'.format(
+        len(labels), len(rings), offsets[-1], args.output))
+
+
+if __name__ == '__main__':
+    main()